@@ -1,27 +1,70 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import xml.etree.ElementTree as ET
-import csv
-import uuid
+import os
 import tkinter.font as tkfont
 
+import csv_io
+import journal
+import library_cache
+import orcad_xml
+import perf
+import template_checks
+import template_diff
+import transforms
+import validators
+import xml_save
+from background import BackgroundJob
+from part_table import PartTable
+from search_index import SearchIndex
+from sorting import SortKeyCache
+from column_fit import ColumnWidths
+from virtual_grid import VirtualGrid
+
 class OrcadLibrarySpreadsheet:
     def __init__(self, root):
         self.root = root
         self.root.title("OrCAD Symbol Library Manager")
-        self.root.iconbitmap('cpu.ico')
+        try:
+            self.root.iconbitmap('cpu.ico')
+        except tk.TclError:
+            pass  # icon missing (or not supported by this window system)
 
         self.template_tree = None
+        self.template_index = None
+        self.template_source = None  # file the template tree currently matches
+        self.model_source = None     # XML file the model was loaded from
         self.template_path = None
-        self.csv_data = []
-        self.props = []
-        self.filtered_ids = []
+        self.csv_path = None
+        self.csv_format = None       # encoding/delimiter of the imported CSV, reused on export
+        self.model = PartTable()
+        self.props = self.model.props
+        self.journal = journal.Journal(self.model)
+        self.row_order = []
         self.updated_parts = set()
-        self.parts = []
+        self.defn_keys = set()
+        self.load_job = None
+        self.export_job = None
+        self.save_job = None
+        self.load_span = None        # perf spans of the running background jobs
+        self.export_span = None
+        self.save_span = None
+        self.perf_window = None
+        self.validation_rules = validators.DEFAULT_RULES
+        self.rules_path = None
         self.current_filter = ''
+        self.value_filter = None     # (column, value) chosen from a heading's value menu
+        self.search_term = ''
+        self.search_index = None
+        self._search_after = None
         self.auto_fit = False
+        self.col_widths = None
         self.sort_directions = {}
+        self.sort_specs = []  # [(column, descending)], most significant first
+        self.sorter = None
         self.create_widgets()
+        self.root.protocol('WM_DELETE_WINDOW', self._on_close)
+        self._sync_journal()
 
     def create_widgets(self):
         # --- Top Frame: Toolbar ---
@@ -38,11 +81,15 @@ class OrcadLibrarySpreadsheet:
             ("Load XML as Template", self.load_xml_template),
             ("Export CSV", self.export_csv),
             ("Import CSV", self.import_csv),
+            ("Undo", self.undo),
+            ("Redo", self.redo),
             ("Validate CSV", self.validate_csv),
             ("Save XML", self.save_xml),
             ("View History", self.show_update_history),
             ("Compare CSV to Template", self.compare_to_template),
-            ("Toggle Auto-Fit", self.toggle_column_fit)
+            ("Bulk Transform", self.open_transforms),
+            ("Toggle Auto-Fit", self.toggle_column_fit),
+            ("Performance", self.show_performance)
         ]
 
         # Add buttons
@@ -59,6 +106,12 @@ class OrcadLibrarySpreadsheet:
         search_entry = ttk.Entry(top, textvariable=self.search_var, width=20)
         search_entry.pack(side=tk.RIGHT, padx=(0, 4))
         search_entry.bind('<Return>', lambda e: self.apply_search())
+        # live search: re-run shortly after the user stops typing
+        self.search_var.trace_add('write', lambda *a: self._schedule_search())
+        self.root.bind('<Escape>', lambda e: self.cancel_jobs())
+        self.root.bind('<Control-z>', lambda e: self.undo())
+        self.root.bind('<Control-y>', lambda e: self.redo())
+        self.root.bind('<Control-Z>', lambda e: self.redo())
 
         # --- Table Frame ---
         outer = ttk.Frame(self.root, borderwidth=2, relief="groove")
@@ -88,11 +141,14 @@ class OrcadLibrarySpreadsheet:
         self.table.bind('<ButtonRelease-1>', self.update_status)
         self.table.bind('<Double-1>', self.edit_cell)
         self.table.bind('<MouseWheel>', self._on_mousewheel)
+        self.table.bind('<Shift-Button-1>', self._on_shift_heading)
+        self.table.bind('<Button-3>', self._on_right_click)
 
-        # Scrollbars
+        # Scrollbars (vertical scrolling is driven by the virtual grid, not the Treeview)
         vsb = ttk.Scrollbar(tf, orient='vertical', command=self.scroll_y_by_lines)
         hsb = ttk.Scrollbar(tf, orient='horizontal', command=self.scroll_x_by_columns)
-        self.table.configure(yscroll=vsb.set, xscroll=hsb.set)
+        self.table.configure(xscroll=hsb.set)
+        self.grid = VirtualGrid(self.table, lambda r: self.model.row(r), yscroll=vsb.set)
         vsb.grid(row=0, column=1, sticky='ns')
         hsb.grid(row=1, column=0, sticky='ew')
 
@@ -121,58 +177,104 @@ class OrcadLibrarySpreadsheet:
             return
         x, y, w, h = bbox
 
-        old = self.table.set(row_id, self.table['columns'][int(col[1:]) - 1])
+        row = self.grid.row_of(row_id)
+        old = self.model.get(row, self.table['columns'][int(col[1:]) - 1])
         entry = ttk.Entry(self.table)
         entry.place(x=x, y=y, width=w, height=h)
         entry.insert(0, old)
         entry.focus()
-        entry.bind('<Return>', lambda e: self._save_edit(entry, row_id, int(col[1:]) - 1))
-        entry.bind('<FocusOut>', lambda e: self._save_edit(entry, row_id, int(col[1:]) - 1))
+        entry.bind('<Return>', lambda e: self._save_edit(entry, row, int(col[1:]) - 1))
+        entry.bind('<FocusOut>', lambda e: self._save_edit(entry, row, int(col[1:]) - 1))
 
     def compare_to_template(self):
         if not self.template_tree:
             return messagebox.showerror("No Template", "Load template first.")
-        if not self.csv_data:
-            return messagebox.showerror("No CSV", "Import CSV first.")
-
-        template_parts = self._extract_template_parts(self.template_tree)
-        added_report = []
-        removed_report = []
-
-        for row in self.csv_data:
-            pname = row[0]
-            if not pname or pname not in template_parts:
-                continue
-            csv_props = {k.strip(): v.strip() for k, v in zip(self.props, row[1:]) if k.strip()}
-            tmpl_props = template_parts[pname]
-
-            csv_keys = {k.lower() for k in csv_props}
-            tmpl_keys = {k.lower() for k in tmpl_props}
+        if not len(self.model):
+            return messagebox.showerror("No Data", "Load XML or import CSV first.")
 
-            added = sorted({k for k in csv_props if k.lower() not in tmpl_keys})
-            removed = sorted({k for k in tmpl_props if k.lower() not in csv_keys})
-
-            if added or removed:
-                added_report.append(f"{pname}: +{', '.join(added) if added else '-'}")
-                removed_report.append(f"{pname}: -{', '.join(removed) if removed else '-'}")
-
-        if not added_report and not removed_report:
-            return messagebox.showinfo("Compare", "CSV and template match exactly.")
+        # Package Defn attributes are part of the table, so they are compared too
+        template_parts = self._extract_template_parts(self.template_tree, with_defn=True)
+        diff = template_diff.TemplateDiff(self.model, template_parts)
+        if not len(diff):
+            return messagebox.showinfo("Compare", "Table and template match exactly.")
+        self._show_diff(diff)
 
+    def _show_diff(self, diff):
         win = tk.Toplevel(self.root)
-        win.title("Compare CSV to Template")
-        txt = tk.Text(win, wrap='word');
-        txt.pack(fill='both', expand=True)
-        txt.insert('end', "Added Fields:\n" + "\n".join(added_report) + "\n\n")
-        txt.insert('end', "Removed Fields:\n" + "\n".join(removed_report))
-        txt.config(state='disabled')
+        win.title("Compare to Template")
+        win.geometry("900x500")
+        bar = ttk.Frame(win)
+        bar.pack(fill=tk.X, padx=4, pady=4)
+        ttk.Label(bar, text=diff.summary()).pack(side=tk.LEFT)
+        ttk.Button(bar, text="Export...", style="Compact.TButton",
+                   command=lambda: self._export_diff(diff)).pack(side=tk.RIGHT, padx=2)
+        kind_var = tk.StringVar(value="All")
+        kinds = ttk.Combobox(bar, textvariable=kind_var, values=("All",) + template_diff.KINDS,
+                             state='readonly', width=16)
+        kinds.pack(side=tk.RIGHT, padx=2)
+
+        frame = ttk.Frame(win)
+        frame.pack(fill=tk.BOTH, expand=True)
+        frame.rowconfigure(0, weight=1)
+        frame.columnconfigure(0, weight=1)
+        tree = ttk.Treeview(frame, columns=template_diff.FIELDS, show='headings', selectmode='browse')
+        for c in template_diff.FIELDS:
+            tree.heading(c, text=c)
+            tree.column(c, width=170 if c in ('Template', 'Table') else 120, anchor='w')
+        vsb = ttk.Scrollbar(frame, orient="vertical")
+        tree.grid(row=0, column=0, sticky='nsew')
+        vsb.grid(row=0, column=1, sticky='ns')
+        # the diff can run to hundreds of thousands of lines; only the visible ones are items
+        grid = VirtualGrid(tree, lambda i: diff.changes[i], yscroll=vsb.set)
+        vsb.config(command=grid.yview)
+        tree.bind('<MouseWheel>', lambda e: grid.scroll(int(-1 * (e.delta / 40))))
+        grid.set_rows(list(range(len(diff))))
+
+        def on_kind(event=None):
+            kind = kind_var.get()
+            grid.set_rows([i for i, c in enumerate(diff.changes) if kind == "All" or c[0] == kind])
+        kinds.bind('<<ComboboxSelected>>', on_kind)
+
+        def on_open(event):
+            iid = tree.focus()
+            i = grid.row_of(iid) if iid else None
+            if i is not None and diff.rows[i] is not None:
+                self._reveal(diff.rows[i], diff.changes[i][2] or None)
+        tree.bind('<Double-1>', on_open)
+        tree.bind('<Return>', on_open)
+
+    def _export_diff(self, diff):
+        path = filedialog.asksaveasfilename(defaultextension=".csv",
+                                            filetypes=[("CSV Files", "*.csv"), ("JSON Files", "*.json")])
+        if not path:
+            return
+        count = diff.write(path)
+        self.status_var.set(f"Exported {count} differences to {os.path.basename(path)}")
+
+    def _reveal(self, row, col=None):
+        # bring a model row (and column, if shown) into view in the main grid
+        if row not in self.grid.rows:
+            # hidden by the search or value filter; clear them so the row can be shown
+            self.value_filter = None
+            self.search_var.set('')
+            self.apply_search()
+            if row not in self.grid.rows:
+                self._refilter()  # only the value filter was active
+        iid = self.grid.reveal(row)
+        if iid is None:
+            return
+        cols = list(self.table['displaycolumns'])
+        if col in cols:
+            self.table.xview_moveto(cols.index(col) / len(cols))
+        self.table.focus_set()
+        self.update_status()
 
     def scroll_y_by_lines(self, *args):
         if args[0] == 'scroll':
             lines = int(args[1]) * 3000  # Adjust vertical scroll speed (was 5000)
-            self.table.yview_scroll(lines, 'units')
+            self.grid.scroll(lines)
         else:
-            self.table.yview(*args)
+            self.grid.yview(*args)
 
     def scroll_x_by_columns(self, *args):
         if args[0] == 'scroll':
@@ -184,29 +286,19 @@ class OrcadLibrarySpreadsheet:
 
     def _on_mousewheel(self, event):
         # On Windows, event.delta is usually 120 per scroll
-        self.table.yview_scroll(int(-1 * (event.delta / 40)), 'units')
+        self.grid.scroll(int(-1 * (event.delta / 40)))
 
-    def _save_edit(self, entry, row_id, ci):
+    def _save_edit(self, entry, row, ci):
+        if not entry.winfo_exists():
+            return  # <Return> already saved; this is the trailing <FocusOut>
         new = entry.get(); entry.destroy()
         col = self.table['columns'][ci]
-        self.table.set(row_id, col, new)
-        try:
-            pkg, libpart = self.parts[int(row_id)]
-            if pkg.find('Defn') is not None and col in pkg.find('Defn').attrib:
-                pkg.find('Defn').set(col, new)
-            else:
-                for sup in libpart.findall('.//SymbolUserProp/Defn'):
-                    if sup.get('name') == col:
-                        sup.set('val', new)
-                        break
-                else:
-                    nv = libpart.find('NormalView')
-                    if nv is None:
-                        nv = ET.SubElement(libpart, 'NormalView')
-                    sup = ET.SubElement(nv, 'SymbolUserProp')
-                    ET.SubElement(sup, 'Defn', name=col, val=new)
-            self.updated_parts.add(self.table.set(row_id, 'PartName'))
-        except: pass
+        # the model is the source of truth; the grid cell is only refreshed from it
+        self.model.set(row, col, new)
+        self.grid.render()
+        if self.auto_fit:
+            self.fit_columns_to_content([col])
+        self.updated_parts.add(self.model.name(row))
         self.update_status()
 
     def toggle_column_fit(self):
@@ -215,263 +307,709 @@ class OrcadLibrarySpreadsheet:
         mode = "Auto-fit" if self.auto_fit else "Manual"
         self.status_var.set(f"Column mode: {mode}")
 
-    def fit_columns_to_content(self):
-        font = tkfont.Font()
-        for col in self.table['columns']:
+    PERCENTILE_FIT_ROWS = 100000  # above this, auto-fit ignores the widest 2% of values
+
+    def fit_columns_to_content(self, cols=None):
+        with perf.timed('fit_columns', rows=len(self.model)):
+            self._fit_columns(cols)
+
+    def _fit_columns(self, cols):
+        if self.auto_fit:
+            if self.col_widths is None or self.col_widths.table is not self.model:
+                if self.col_widths:
+                    self.col_widths.close()
+                # one font and one measured width per distinct string, reused across fits
+                self.col_widths = ColumnWidths(self.model, tkfont.Font().measure)
+            self.col_widths.percentile = 0.98 if len(self.model) > self.PERCENTILE_FIT_ROWS else None
+        for col in cols or self.table['columns']:
             if self.auto_fit:
-                max_width = font.measure(col) + 20  # start with header width
-                for iid in self.table.get_children():
-                    val = str(self.table.set(iid, col))
-                    width = font.measure(val) + 10
-                    if width > max_width:
-                        max_width = width
-                self.table.column(col, width=max_width, stretch=False)
+                self.table.column(col, width=self.col_widths.fit(col), stretch=False)
             else:
                 self.table.column(col, width=120, stretch=True)
 
     def load_xml(self):
+        if self._save_running():
+            return
         path = filedialog.askopenfilename(filetypes=[("XML Files", "*.xml")])
         if not path: return
-        self.tree = ET.parse(path)
+        if self.load_job:
+            self.load_job.cancel()
+            self._end_span('load_span', cancelled=1)
         self.filename = path
-        root = self.tree.getroot()
-        self.parts = [(pkg, pkg.find('LibPart')) for pkg in root.findall('.//Package') if pkg.find('LibPart') is not None]
-        self._extract_props()
+        self.model_source = path
+        self.csv_format = None
+        self._set_model(PartTable())
+        self.defn_keys = set()
         self.populate_table()
-        self.status_var.set(f"Loaded {len(self.parts)} parts")
-
-    def populate_table(self):
-        cols = ['PartName'] + self.props
+        self.status_var.set(f"Loading {os.path.basename(path)}...")
+        self.load_span = perf.begin('load_xml')
+        # parse on a worker thread; rows are appended to the model in batches as they arrive
+        self.load_job = BackgroundJob(self.root, lambda job: self._stream_xml(job, path),
+                                      on_item=self._on_xml_batch, on_done=self._on_xml_loaded,
+                                      on_error=self._on_load_error).start()
+
+    XML_BATCH = 1000
+
+    def _stream_xml(self, job, path):
+        with perf.timed('parse_xml') as span:
+            # an unchanged library comes straight from the on-disk cache as a finished table
+            cached = library_cache.lookup(path)
+            if cached:
+                span.add(cache_hits=1, rows=len(cached[0]))
+                return cached
+            st = os.stat(path)
+            size = st.st_size or 1
+            enc = library_cache.Encoder()
+            batch = []
+            with open(path, 'rb') as raw:
+                f = library_cache.HashingReader(raw)
+                for rec in orcad_xml.iter_part_records(f):
+                    if job.cancelled:
+                        return None
+                    enc.add(rec)
+                    batch.append(rec)
+                    if len(batch) >= self.XML_BATCH:
+                        span.add(rows=len(batch))
+                        job.emit((batch, f.tell() / size))
+                        batch = []
+                digest = f.finish()
+            span.add(rows=len(batch), bytes=size)
+            job.emit((batch, 1.0))
+            library_cache.store(path, st, digest, enc)
+            return None
+
+    def _on_xml_batch(self, item):
+        batch, done = item
+        with perf.timed('add_records', rows=len(batch)):
+            ncols = len(self.model.props)
+            start = len(self.model)
+            orcad_xml.add_records(self.model, batch, self.defn_keys)
+            if len(self.model.props) != ncols:
+                self._configure_columns()
+            self._show_appended(start)
+        self.status_var.set(f"Loading... {done:.0%} ({len(self.model)} parts) - Esc to cancel")
+
+    def _show_appended(self, start):
+        new_rows = range(start, len(self.model))
+        if self.grid.rows is not self.row_order:
+            # a filter is active; only matching rows join the view
+            self.grid.rows.extend(self._filtered(list(new_rows)))
+        self.row_order.extend(new_rows)
+        self.grid.render()
+
+    def _on_xml_loaded(self, result):
+        self.load_job = None
+        if result is not None:
+            model, self.defn_keys = result
+            self._set_model(model)
+            self.populate_table()
+            self.status_var.set(f"Loaded {len(self.model)} parts (cached)")
+        else:
+            self.model.reorder(sorted(self.model.props))
+            self._configure_columns()  # also re-fits columns for the complete data when auto-fit is on
+            self.grid.render()
+            self.status_var.set(f"Loaded {len(self.model)} parts")
+        self._end_span('load_span', rows=len(self.model))
+        self._attach_journal(self.model_source)
+
+    def cancel_jobs(self):
+        if self.load_job:
+            self.load_job.cancel(); self.load_job = None
+            self._end_span('load_span', rows=len(self.model), cancelled=1)
+            self.status_var.set(f"Load cancelled ({len(self.model)} rows loaded)")
+        if self.export_job:
+            self.export_job.cancel(); self.export_job = None
+            self._end_span('export_span', cancelled=1)
+            self.status_var.set("Export cancelled")
+
+    def _end_span(self, attr, **counters):
+        span = getattr(self, attr)
+        if span:
+            span.end(**counters)
+            setattr(self, attr, None)
+
+    def _on_load_error(self, exc):
+        self.load_job = None
+        self._end_span('load_span', errors=1)
+        self.status_var.set("Load failed.")
+        messagebox.showerror("Load Error", str(exc))
+
+    def _configure_columns(self):
+        cols = self.model.header()
         # configure columns and enable resizing
         self.table.config(columns=cols, displaycolumns=cols)
         for c in cols:
             self.table.heading(c, text=c, command=lambda col=c: self.sort_by_column(col))
             self.table.column(c, width=120, anchor='w', stretch=True)
+        self._update_sort_headings()
+        if self.auto_fit:
+            self.fit_columns_to_content()
 
-
-        # clear previous rows
-        self.table.delete(*self.table.get_children())
-        self.filtered_ids.clear()
-
-        # populate with unique IDs to avoid duplicates
-        for pkg, libpart in self.parts:
-            defn = pkg.find('Defn')
-            lp_defn = libpart.find('Defn')
-            pname = lp_defn.get('CellName') if lp_defn is not None else defn.get('name')
-            # gather all attributes and user props
-            attr_map = defn.attrib if defn is not None else {}
-            user_map = {sup.get('name'): sup.get('val', '') for sup in libpart.findall('.//SymbolUserProp/Defn')}
-            merged = {**attr_map, **user_map}
-            row = [pname] + [merged.get(p, '') for p in self.props]
-            iid = str(uuid.uuid4())
-            self.table.insert('', 'end', iid=iid, values=row)
-            self.filtered_ids.append(iid)
-
-
-    def sort_by_column(self, col):
-        items = [(self.table.set(k, col), k) for k in self.table.get_children('')]
-
+    def populate_table(self):
+        with perf.timed('populate_table', rows=len(self.model)):
+            self.sort_specs = []
+            self._configure_columns()
+
+            # only the visible window of rows becomes Treeview items
+            self.row_order = list(range(len(self.model)))
+            self.search_term = self.current_filter = ''
+            self.search_var.set('')  # the box must not show a query the new rows are not filtered by
+            self.value_filter = None
+            self.grid.set_rows(self.row_order)
+
+    def sort_by_column(self, col, add=False):
         # Determine sort direction
         descending = self.sort_directions.get(col, False)
-        try:
-            # Try to sort as numbers first
-            items.sort(key=lambda x: float(x[0]), reverse=descending)
-        except ValueError:
-            # Fall back to string sort
-            items.sort(key=lambda x: x[0].lower(), reverse=descending)
 
-        for index, (val, k) in enumerate(items):
-            self.table.move(k, '', index)
+        # Shift+click adds the column as a secondary key (or flips it in place)
+        if add:
+            specs = list(self.sort_specs)
+            for i, (c, _) in enumerate(specs):
+                if c == col:
+                    specs[i] = (col, descending)
+                    break
+            else:
+                specs.append((col, descending))
+        else:
+            specs = [(col, descending)]
+        self.sort_specs = specs
+
+        with perf.timed('sort_by_column', rows=len(self.model), keys=len(specs)):
+            if self.sorter is None or self.sorter.table is not self.model:
+                if self.sorter:
+                    self.sorter.close()
+                self.sorter = SortKeyCache(self.model)
+            # typed keys (10k, 4.7uF, 0402, R10) are cached per column; the view is reordered in one batch
+            self.row_order = self.sorter.order(specs)
+            self._refilter()
+            self._update_sort_headings()
 
         # Toggle sort direction
         self.sort_directions[col] = not descending
 
+    def _on_shift_heading(self, event):
+        if self.table.identify_region(event.x, event.y) != 'heading':
+            return None
+        col = self.table.identify_column(event.x)
+        if col == '#0':
+            return None
+        self.sort_by_column(self.table['displaycolumns'][int(col[1:]) - 1], add=True)
+        return 'break'
+
+    def _update_sort_headings(self):
+        arrows = {c: (' ▼' if d else ' ▲') for c, d in self.sort_specs}
+        for c in self.model.header():
+            self.table.heading(c, text=c + arrows.get(c, ''))
+
     def load_xml_template(self):
+        if self._save_running():
+            return
         path = filedialog.askopenfilename(filetypes=[("XML Files", "*.xml")])
         if not path: return
-        self.template_tree = ET.parse(path)
+        self.status_var.set(f"Loading template {os.path.basename(path)}...")
+        # the template is written back on save, so it is kept as a full tree
+        BackgroundJob(self.root, lambda job: self._parse_template(path),
+                      on_done=lambda result: self._on_template_loaded(result, path),
+                      on_error=self._on_template_error).start()
+
+    def _parse_template(self, path):
+        tree = ET.parse(path)
+        return tree, xml_save.TemplateIndex(tree, source=path)
+
+    def _on_template_error(self, exc):
+        # a library load may be running meanwhile; its job and span stay untouched
+        self.status_var.set("Template load failed.")
+        messagebox.showerror("Template Error", str(exc))
+
+    def _on_template_loaded(self, result, path):
+        self.template_tree, self.template_index = result
         self.template_path = path
+        self.template_source = path
         messagebox.showinfo("Template Loaded", f"Template loaded from {path}")
         self.status_var.set(f"Template: {path}")
 
+    SEARCH_DEBOUNCE_MS = 200
+
+    def _schedule_search(self):
+        if self._search_after:
+            self.root.after_cancel(self._search_after)
+        self._search_after = self.root.after(self.SEARCH_DEBOUNCE_MS, self.apply_search)
+
     def apply_search(self):
-        term = self.search_var.get().strip().lower()
+        self._search_after = None
+        term = self.search_var.get().strip()
+        if term == self.search_term:
+            return
+        self.search_term = term
         self.current_filter = term  # store for status
-        for iid in self.filtered_ids:
-            values = self.table.item(iid)['values']
-            # Make everything a string first
-            line = ' '.join(str(v) for v in values).lower()
-            if term in line:
-                self.table.reattach(iid, '', 'end')
-            else:
-                self.table.detach(iid)
+        with perf.timed('apply_search', rows=len(self.model)) as span:
+            self._refilter()
+            span.add(hits=len(self.grid.rows))
         self.update_status()
 
-    def export_csv(self):
-        # 1) Grab current columns and rows from the Treeview
-        cols = list(self.table['columns'])
-        rows = [self.table.item(iid)['values'] for iid in self.table.get_children()]
+    def _refilter(self):
+        self.grid.set_rows(self._filtered(self.row_order))
+
+    def _filtered(self, rows):
+        # `rows` (itself when nothing filters) narrowed to the value filter and the search query;
+        # terms match substrings in any column, Column:value restricts a term to one column
+        if self.value_filter:
+            col, value = self.value_filter
+            get = self.model.get
+            rows = [r for r in rows if get(r, col) == value]
+        if not self.search_term:
+            return rows
+        if self.search_index is None or self.search_index.table is not self.model:
+            if self.search_index:
+                self.search_index.close()
+            self.search_index = SearchIndex(self.model)
+        hits = self.search_index.search(self.search_term)
+        return rows if hits is None else [r for r in rows if r in hits]
+
+    MENU_VALUES = 25  # most frequent values offered by the value menus
+
+    def _value_menu(self, col, command):
+        # one entry per distinct value, most frequent first, from the column's value counts
+        counts = sorted(self.model.value_counts(col).items(), key=lambda kv: (-kv[1], kv[0]))
+        menu = tk.Menu(self.table, tearoff=0)
+        for value, n in counts[:self.MENU_VALUES]:
+            menu.add_command(label=f"{value or '(empty)'}    ({n})", command=lambda v=value: command(v))
+        if len(counts) > self.MENU_VALUES:
+            menu.add_command(label=f"... {len(counts) - self.MENU_VALUES} more values", state='disabled')
+        return menu
+
+    def _on_right_click(self, event):
+        col = self.table.identify_column(event.x)
+        if col == '#0' or not self.table['displaycolumns'] or not len(self.model):
+            return
+        col = self.table['displaycolumns'][int(col[1:]) - 1]
+        region = self.table.identify_region(event.x, event.y)
+        if region == 'heading':
+            # enum filter: show only the rows holding one value of this column
+            menu = self._value_menu(col, lambda v: self._set_value_filter((col, v)))
+            menu.insert_command(0, label="Show all", command=lambda: self._set_value_filter(None))
+            menu.insert_separator(1)
+        elif region == 'cell':
+            iid = self.table.identify_row(event.y)
+            row = self.grid.row_of(iid) if iid else None
+            if row is None:
+                return
+            rows = sorted(self.grid.selected) if row in self.grid.selected else [row]
+            # value picker: set the clicked (or selected) rows to a value the column already uses
+            menu = self._value_menu(col, lambda v: self._set_values(rows, col, v))
+        else:
+            return
+        menu.tk_popup(event.x_root, event.y_root)
 
-        # 2) Ask for filename and write
+    def _set_value_filter(self, value_filter):
+        self.value_filter = value_filter
+        self._refilter()
+        self.update_status()
+
+    def _set_values(self, rows, col, value):
+        with self.journal.group():
+            for r in rows:
+                self.model.set(r, col, value)
+        self.grid.render()
+        if self.auto_fit:
+            self.fit_columns_to_content([col])
+        self.updated_parts.update(self.model.name(r) for r in rows)
+        self.update_status()
+
+    def export_csv(self):
+        # Ask for filename and write the model's rows in current view order
         file = filedialog.asksaveasfilename(defaultextension=".csv",
                                             filetypes=[("CSV Files", "*.csv")])
         if not file:
             return
-        with open(file, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(cols)
-            writer.writerows(rows)
-
-        self.status_var.set(f"Exported {len(rows)} rows to CSV")
+        if self.export_job:
+            self.export_job.cancel()
+        model, rows = self.model, list(self.grid.rows)
+        self._end_span('export_span', cancelled=1)
+        self.export_span = perf.begin('export_csv')
+        # written in chunks on a worker thread; the file only appears once complete
+        self.export_job = BackgroundJob(self.root, lambda job: self._write_csv(job, file, model, rows),
+                                        on_item=lambda n: self.status_var.set(
+                                            f"Exporting... {n / max(len(rows), 1):.0%} - Esc to cancel"),
+                                        on_done=self._on_csv_exported, on_error=self._on_export_error).start()
+
+    def _write_csv(self, job, path, model, rows):
+        writer = csv_io.iter_write(path, model, rows, self.csv_format)
+        count = 0
+        for count in writer:
+            if job.cancelled:
+                writer.close()
+                return None
+            job.emit(count)
+        return count
+
+    def _on_csv_exported(self, count):
+        self.export_job = None
+        self._end_span('export_span', rows=count or 0)
+        self.status_var.set(f"Exported {count} rows to CSV")
+
+    def _on_export_error(self, exc):
+        self.export_job = None
+        self._end_span('export_span', errors=1)
+        self.status_var.set("Export failed.")
+        messagebox.showerror("Export Error", str(exc))
 
     def import_csv(self):
+        if self._save_running():
+            return
         file = filedialog.askopenfilename(filetypes=[("CSV Files", "*.csv")])
         if not file: return
-        with open(file, newline='', encoding='utf-8') as f:
-            rows = list(csv.reader(f))
-        if not rows or "PartName" not in rows[0]: return messagebox.showerror("CSV Error", "Missing 'PartName'")
-        header = rows[0]
-        data = [[str(cell).strip() for cell in row] for row in rows[1:]]
-        self.csv_data = data; self.props = header[1:]
-        self.table.config(columns=header, displaycolumns=header)
-        for c in header:
-            self.table.heading(c, text=c); self.table.column(c, width=120, stretch=True)
-        self.table.delete(*self.table.get_children()); self.filtered_ids.clear()
-        for row in data:
-            iid = str(uuid.uuid4())
-            self.table.insert('', 'end', iid=iid, values=row)
-            self.filtered_ids.append(iid)
-        self.status_var.set(f"Imported {len(data)} rows")
-
-    def validate_csv(self):
-        if not self.template_tree:
-            messagebox.showerror("No Template", "Load template first.")
+        if self.load_job:
+            self.load_job.cancel(); self.load_job = None
+            self._end_span('load_span', cancelled=1)
+        try:
+            reader = csv_io.CsvReader(file)
+        except (ValueError, OSError, UnicodeError) as e:
+            return messagebox.showerror("CSV Error", str(e))
+        self.model_source = None
+        self._set_model(PartTable())
+        self.model.extend_rows(reader.header, ())
+        self.csv_path = file
+        self.csv_format = reader.format
+        self.populate_table()
+        self.status_var.set(f"Importing {os.path.basename(file)}...")
+        self.load_span = perf.begin('import_csv')
+        # rows are read on a worker thread and appended to the model chunk by chunk
+        self.load_job = BackgroundJob(self.root, lambda job: self._stream_csv(job, reader),
+                                      on_item=lambda item: self._on_csv_chunk(reader.header, item),
+                                      on_done=self._on_csv_imported, on_error=self._on_load_error).start()
+
+    def _stream_csv(self, job, reader):
+        with reader, perf.timed('read_csv') as span:
+            for chunk in reader:
+                if job.cancelled:
+                    return None
+                span.add(rows=len(chunk))
+                job.emit((chunk, reader.progress()))
+        return None
+
+    def _on_csv_chunk(self, header, item):
+        chunk, done = item
+        with perf.timed('add_records', rows=len(chunk)):
+            self._show_appended(self.model.extend_rows(header, chunk))
+        self.status_var.set(f"Importing... {done:.0%} ({len(self.model)} rows) - Esc to cancel")
+
+    def _on_csv_imported(self, result):
+        self.load_job = None
+        if self.auto_fit:
+            self.fit_columns_to_content()
+        self.status_var.set(f"Imported {len(self.model)} rows")
+        self._end_span('load_span', rows=len(self.model))
+        self._attach_journal(self.csv_path)
+
+    def _set_model(self, model):
+        # a new model abandons the old one's edits, including their recovery sidecar
+        self.journal.discard()
+        self.journal.close()
+        self.model = model
+        self.props = model.props
+        self.journal = journal.Journal(model)
+
+    def _attach_journal(self, source):
+        # edits are journaled to a sidecar once loading is done; offer what a crash left behind
+        changes = journal.pending(source)
+        self.journal.attach(source)
+        if not changes:
+            return
+        if messagebox.askyesno("Recover Edits", f"{len(changes)} unsaved edits to {os.path.basename(source)} "
+                                                f"were found from a previous session.\n\nRestore them?"):
+            self.journal.recover(changes)
+            self.updated_parts.update(self.model.name(r) for r, _, _ in changes if r < len(self.model))
+            self.grid.render()
+            self.status_var.set(f"Recovered {len(changes)} edits (Ctrl+Z to undo)")
+        else:
+            self.journal.discard()
+
+    JOURNAL_SYNC_MS = 1000
+
+    def _sync_journal(self):
+        self.journal.sync()
+        self.root.after(self.JOURNAL_SYNC_MS, self._sync_journal)
+
+    def undo(self):
+        step = self.journal.undo()
+        if step:
+            self.grid.render()
+            self.status_var.set(f"Undid {len(step)} change{'s' if len(step) > 1 else ''}")
+
+    def redo(self):
+        step = self.journal.redo()
+        if step:
+            self.grid.render()
+            self.status_var.set(f"Redid {len(step)} change{'s' if len(step) > 1 else ''}")
+
+    def _save_running(self):
+        # loads would replace the model or template the running save reports back to
+        if self.save_job:
+            messagebox.showinfo("Saving", "Please wait for the save to finish.")
+        return self.save_job is not None
+
+    def _on_close(self):
+        if self._save_running():
             return
+        # a clean exit leaves nothing to recover
+        self.journal.discard()
+        self.root.destroy()
 
-        # template part names (case‐insensitive)
-        tmpl = self._extract_template_parts(self.template_tree)
-        tmpl_keys = {name.lower() for name in tmpl}
-
-        # table part names
-        table_parts = [self.table.set(iid, 'PartName').strip()
-                       for iid in self.table.get_children()]
-        updated = [p for p in table_parts if p.lower() in tmpl_keys]
-        added = [p for p in table_parts if p.lower() not in tmpl_keys]
-
-        msg = (
-            f"CSV Validation Results:\n\n"
-            f"  To Update (in template): {len(updated)}\n"
-            f"    Examples: {updated[:5]}\n\n"
-            f"  To Add (new parts): {len(added)}\n"
-            f"    Examples: {added[:5]}"
-        )
-        messagebox.showinfo("Validate CSV", msg)
+    def validate_csv(self):
+        report = validators.validate(self.model, self.validation_rules, self.grid.rows)
+        header = report.summary()
+        status = f"Validated ({len(report)} problems"
+        if self.template_tree:
+            # template part names (case‐insensitive) vs table part names in view order
+            tmpl = self._extract_template_parts(self.template_tree)
+            table_parts = [self.model.name(r).strip() for r in self.grid.rows]
+            updated, added = template_checks.validate_names(table_parts, tmpl)
+            header += f"\nTemplate: {len(updated)} parts to update, {len(added)} new parts"
+            status += f", upd {len(updated)}, add {len(added)}"
 
         # reflect in status bar
-        self.current_filter = f"Validated (upd {len(updated)}, add {len(added)})"
+        self.current_filter = status + ")"
         self.update_status()
+        self._show_validation(report, header)
+
+    def _show_validation(self, report, header):
+        win = tk.Toplevel(self.root)
+        win.title("Validation")
+        win.geometry("900x500")
+        bar = ttk.Frame(win)
+        bar.pack(fill=tk.X, padx=4, pady=4)
+        ttk.Label(bar, text=header, justify='left').pack(side=tk.LEFT)
+
+        def load_rules():
+            path = filedialog.askopenfilename(filetypes=[("Rule sets", "*.json")], parent=win)
+            if not path:
+                return
+            try:
+                specs = validators.load_rules(path)
+                validators.compile_rules(specs)
+            except (OSError, ValueError) as e:
+                return messagebox.showerror("Rules", str(e), parent=win)
+            self.validation_rules, self.rules_path = specs, path
+            win.destroy()
+            self.validate_csv()
+
+        def export():
+            path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV Files", "*.csv")],
+                                                parent=win)
+            if path:
+                report.write_csv(path, self.model)
+
+        ttk.Button(bar, text="Export...", style="Compact.TButton", command=export).pack(side=tk.RIGHT, padx=2)
+        ttk.Button(bar, text="Load Rules...", style="Compact.TButton", command=load_rules).pack(side=tk.RIGHT, padx=2)
+        ttk.Label(bar, text=os.path.basename(self.rules_path) if self.rules_path else "default rules") \
+            .pack(side=tk.RIGHT, padx=6)
+
+        frame = ttk.Frame(win)
+        frame.pack(fill=tk.BOTH, expand=True)
+        frame.rowconfigure(0, weight=1)
+        frame.columnconfigure(0, weight=1)
+        cols = ('Row', 'PartName', 'Property', 'Rule', 'Problem')
+        tree = ttk.Treeview(frame, columns=cols, show='headings', selectmode='browse')
+        for c in cols:
+            tree.heading(c, text=c)
+            tree.column(c, width=60 if c == 'Row' else 320 if c == 'Problem' else 140, anchor='w')
+        vsb = ttk.Scrollbar(frame, orient="vertical")
+        tree.grid(row=0, column=0, sticky='nsew')
+        vsb.grid(row=0, column=1, sticky='ns')
+        errors = report.errors
+        grid = VirtualGrid(tree, lambda i: (errors[i][0] + 1, self.model.name(errors[i][0])) + errors[i][1:],
+                           yscroll=vsb.set)
+        vsb.config(command=grid.yview)
+        tree.bind('<MouseWheel>', lambda e: grid.scroll(int(-1 * (e.delta / 40))))
+        grid.set_rows(list(range(len(errors))))
+
+        def on_open(event):
+            iid = tree.focus()
+            i = grid.row_of(iid) if iid else None
+            if i is not None:
+                self._reveal(errors[i][0], errors[i][1])
+        tree.bind('<Double-1>', on_open)
+        tree.bind('<Return>', on_open)
 
     def save_xml(self):
         if not self.template_tree:
             messagebox.showerror("No Template", "Load template first.")
             return
-
-        tree = self.template_tree
-        root = tree.getroot()
-        cols = list(self.table['columns'])
-        update_map = {}
-
-        # 1) Extract updated values from table and normalize keys
-        for iid in self.table.get_children():
-            values = self.table.item(iid)['values']
-            partname = str(values[0]).strip()
-            key = partname.lower()
-
-            prop_map = dict(zip(cols[1:], values[1:]))
-
-            # Identify Defn attributes from any known part
-            defn_keys = set()
-            for pkg, libpart in self.parts:
-                if pkg is not None and pkg.find('Defn') is not None:
-                    defn_keys.update(pkg.find('Defn').attrib.keys())
-
-            props_defn = {k: prop_map[k] for k in prop_map if k in defn_keys}
-            props_sup = {k: prop_map[k] for k in prop_map if k not in defn_keys}
-            update_map[key] = (props_defn, props_sup)
-
-        template_parts = self._extract_template_parts(tree)
-        count = 0
-
-        # 2) Update template with normalized keys
-        for pkg in root.findall('.//Package'):
-            libpart = pkg.find('LibPart')
-            if libpart is None:
-                continue
-
-            pkg_defn = pkg.find('Defn')
-            lib_defn = libpart.find('Defn')
-            if pkg_defn is None or lib_defn is None:
-                continue
-
-            pname = lib_defn.get('CellName')
-            if not pname:
-                continue
-
-            key = str(pname).strip().lower()
-            if key not in update_map:
+        if self.save_job:
+            return messagebox.showinfo("Saving", "A save is already in progress.")
+        report = validators.validate(self.model, self.validation_rules, self.grid.rows)
+        if len(report) and not messagebox.askyesno("Validation", report.summary() + "\n\nSave anyway?"):
+            return self._show_validation(report, report.summary())
+
+        # 1) Apply model rows (view order) to the indexed template in one pass.
+        # When the template matches the file the model came from, only edited rows can differ.
+        incremental = self.model_source is not None and self.model_source == self.template_source
+        # incremental saves include edited rows a filter hides: the dirty map is cleared below
+        rows = xml_save.save_rows(self.model, self.grid.rows, incremental, self.strict_save.get())
+        with perf.timed('apply_updates', rows=len(rows)) as span:
+            count, skipped = xml_save.apply_updates(self.template_index, self.model, rows,
+                                                    self.defn_keys, strict=self.strict_save.get())
+            span.add(parts=count)
+        if not incremental:
+            self.template_source = None  # template now holds values from elsewhere
+            for pname in skipped:
                 print(f"⚠ Skipping: '{pname}' not found in CSV update map")
-                continue
-
-            props_defn, props_sup = update_map[key]
-
-            # ✅ Always update all <Package><Defn> attributes (mandatory fields)
-            for k, v in props_defn.items():
-                pkg_defn.set(k, str(v).strip() if v is not None else "")
-
-            # ✅ Keep only CellName in <LibPart><Defn>
-            for attrib in list(lib_defn.attrib):
-                if attrib != 'CellName':
-                    del lib_defn.attrib[attrib]
-
-            if 'CellName' in props_defn:
-                lib_defn.set('CellName', props_defn['CellName'])
-
-            # ✅ Ensure <NormalView> exists
-            nv = libpart.find('NormalView')
-            if nv is None:
-                nv = ET.SubElement(libpart, 'NormalView')
-
-            # ✅ Remove old SymbolUserProps
-            for old in list(nv.findall('SymbolUserProp')):
-                nv.remove(old)
-
-            # ✅ Add SymbolUserProps from template mask (preserve order)
-            mask = template_parts.get(pname, {})
-            for prop_name, orig_val in mask.items():
-                val = props_sup.get(prop_name, orig_val)
-                if self.strict_save.get() and not val:
-                    continue
-                sup = ET.SubElement(nv, 'SymbolUserProp')
-                ET.SubElement(sup, 'Defn', name=str(prop_name), val=str(val))
-
-            # ✅ Add new SymbolUserProps not in template or Defn
-            used_keys = {k.lower() for k in mask}
-            existing_defn_keys = {k.lower() for k in props_defn}
-            for k, v in props_sup.items():
-                if not v or k.lower() in used_keys or k.lower() in existing_defn_keys:
-                    continue
-                sup = ET.SubElement(nv, 'SymbolUserProp')
-                ET.SubElement(sup, 'Defn', name=str(k), val=str(v))
-
-            count += 1
-
-        # 3) Save output file
+
+        # 2) Save output file; unchanged packages are copied verbatim from the last written file
         fp = filedialog.asksaveasfilename(defaultextension=".xml", filetypes=[("XML", "*.xml")])
-        if fp:
-            ET.indent(tree, space="  ")
-            tree.write(fp, encoding='utf-8', xml_declaration=True)
-            self.status_var.set(f"Saved {count} parts")
-            messagebox.showinfo("Saved", f"Updated {count} parts to XML")
+        if not fp:
+            return
+        # serialized on a worker thread into a temp file that replaces `fp` when complete;
+        # edits made meanwhile land in a fresh dirty map and stay pending for the next save
+        saved_dirty, self.model.dirty = self.model.dirty, {}
+        model, index = self.model, self.template_index
+        self.status_var.set(f"Saving {os.path.basename(fp)}...")
+        self.save_span = perf.begin('save_xml', parts=count)
+        self.save_job = BackgroundJob(self.root, lambda job: self._write_xml(job, index, fp),
+                                      on_item=lambda done: self.status_var.set(f"Saving... {done:.0%}"),
+                                      on_done=lambda mode: self._on_saved(mode, fp, count, incremental, model, index),
+                                      on_error=lambda exc: self._on_save_error(exc, saved_dirty, model)).start()
+
+    def _write_xml(self, job, index, fp):
+        with perf.timed('write_xml'):
+            return xml_save.write_tree(index, fp, progress=job.emit)
+
+    def _on_saved(self, mode, fp, count, incremental, model, index):
+        self.save_job = None
+        self._end_span('save_span', **{mode: 1})
+        # the file only describes the model and template the save started from
+        if self.model is model and self.template_index is index:
+            self.template_source = fp
+            # after a full save only the visible rows are known to match the written file
+            self.model_source = fp if incremental else None
+            if self.model_source:
+                # edits made while the save ran are not in the file; they stay recoverable
+                self.journal.rebase(fp, keep=model.dirty)
+        self.status_var.set(f"Saved {count} parts ({mode})")
+        messagebox.showinfo("Saved", f"Updated {count} parts to XML")
+
+    def _on_save_error(self, exc, saved_dirty, model):
+        self.save_job = None
+        self._end_span('save_span', errors=1)
+        if self.model is model:
+            for r, props in saved_dirty.items():
+                model.dirty.setdefault(r, set()).update(props)
+        self.status_var.set("Save failed.")
+        messagebox.showerror("Save Error", f"{exc}\n\nThe existing file was left unchanged.")
+
+    def open_transforms(self):
+        win = tk.Toplevel(self.root)
+        win.title("Bulk Transform")
+        win.geometry("820x560")
+        form = ttk.Frame(win)
+        form.pack(fill=tk.X, padx=6, pady=6)
+        packs = {f"Preset: {name}": specs for name, specs in transforms.PRESETS.items()}
+        rule_var = tk.StringVar(value='replace')
+        fields = {k: tk.StringVar() for k in ('columns', 'find', 'replace', 'from', 'to')}
+        mode_var = tk.StringVar(value='upper')
+        regex_var = tk.BooleanVar(value=False)
+        icase_var = tk.BooleanVar(value=False)
+
+        def load_pack():
+            path = filedialog.askopenfilename(filetypes=[("Rule packs", "*.json")], parent=win)
+            if not path:
+                return
+            try:
+                packs[f"Pack: {os.path.basename(path)}"] = transforms.load_pack(path)
+            except (OSError, ValueError) as e:
+                return messagebox.showerror("Rule Pack", str(e), parent=win)
+            rules_box['values'] = list(transforms.RULES) + list(packs)
+            rule_var.set(f"Pack: {os.path.basename(path)}")
+
+        ttk.Label(form, text="Rule:").grid(row=0, column=0, sticky='w')
+        rules_box = ttk.Combobox(form, textvariable=rule_var, state='readonly', width=28,
+                                 values=list(transforms.RULES) + list(packs))
+        rules_box.grid(row=0, column=1, sticky='w')
+        ttk.Button(form, text="Load Pack...", style="Compact.TButton", command=load_pack).grid(row=0, column=2, sticky='w')
+        ttk.Label(form, text="Columns (blank = all):").grid(row=0, column=3, sticky='e')
+        ttk.Entry(form, textvariable=fields['columns'], width=30).grid(row=0, column=4, sticky='w')
+        ttk.Label(form, text="Find:").grid(row=1, column=0, sticky='w')
+        ttk.Entry(form, textvariable=fields['find'], width=30).grid(row=1, column=1, sticky='w')
+        ttk.Label(form, text="Replace:").grid(row=1, column=3, sticky='e')
+        ttk.Entry(form, textvariable=fields['replace'], width=30).grid(row=1, column=4, sticky='w')
+        ttk.Checkbutton(form, text="Regex", variable=regex_var).grid(row=2, column=1, sticky='w')
+        ttk.Checkbutton(form, text="Ignore case", variable=icase_var).grid(row=2, column=2, sticky='w')
+        ttk.Label(form, text="Case:").grid(row=2, column=3, sticky='e')
+        ttk.Combobox(form, textvariable=mode_var, values=list(transforms.Case.MODES), state='readonly',
+                     width=10).grid(row=2, column=4, sticky='w')
+        ttk.Label(form, text="Rename from:").grid(row=3, column=0, sticky='w')
+        ttk.Entry(form, textvariable=fields['from'], width=30).grid(row=3, column=1, sticky='w')
+        ttk.Label(form, text="to:").grid(row=3, column=3, sticky='e')
+        ttk.Entry(form, textvariable=fields['to'], width=30).grid(row=3, column=4, sticky='w')
+
+        summary = tk.Text(win, height=7, wrap='none')
+        summary.pack(fill=tk.X, padx=6)
+        frame = ttk.Frame(win)
+        frame.pack(fill=tk.BOTH, expand=True, padx=6, pady=4)
+        frame.rowconfigure(0, weight=1)
+        frame.columnconfigure(0, weight=1)
+        cols = ('PartName', 'Property', 'Old', 'New')
+        tree = ttk.Treeview(frame, columns=cols, show='headings')
+        for c in cols:
+            tree.heading(c, text=c)
+            tree.column(c, width=180, anchor='w')
+        vsb = ttk.Scrollbar(frame, orient="vertical")
+        tree.grid(row=0, column=0, sticky='nsew')
+        vsb.grid(row=0, column=1, sticky='ns')
+        state = {'preview': None}
+        grid = VirtualGrid(tree, lambda i: (self.model.name(state['preview'].changes[i][0]),)
+                           + state['preview'].changes[i][1:], yscroll=vsb.set)
+        vsb.config(command=grid.yview)
+        tree.bind('<MouseWheel>', lambda e: grid.scroll(int(-1 * (e.delta / 40))))
+
+        def build_rules():
+            kind = rule_var.get()
+            if kind in packs:
+                specs = packs[kind]
+                return [s if not isinstance(s, dict) else transforms.rule_from_spec(s) for s in specs]
+            columns = [c.strip() for c in fields['columns'].get().split(',') if c.strip()] or None
+            if kind == 'replace':
+                return [transforms.Replace(fields['find'].get(), fields['replace'].get(), columns,
+                                           regex=regex_var.get(), ignore_case=icase_var.get())]
+            if kind == 'case':
+                return [transforms.Case(mode_var.get(), columns)]
+            if kind == 'units':
+                return [transforms.Units(columns)]
+            return [transforms.Rename(fields['from'].get().strip(), fields['to'].get().strip())]
+
+        def run_preview():
+            try:
+                rules = build_rules()
+            except ValueError as e:
+                return messagebox.showerror("Bulk Transform", str(e), parent=win)
+            # only the rows in the current (filtered, sorted) view are transformed
+            state['preview'] = transforms.preview(self.model, rules, self.grid.rows)
+            summary.delete('1.0', 'end')
+            summary.insert('end', f"Dry run over {len(self.grid.rows)} rows in view\n"
+                           + state['preview'].summary())
+            grid.set_rows(list(range(len(state['preview']))))
+            return state['preview']
+
+        def run_apply():
+            result = run_preview()
+            if result is None or not len(result):
+                return
+            columns = len(self.model.props)
+            count = transforms.apply(self.model, result, self.journal)
+            self.updated_parts.update(self.model.name(r) for r, _, _, _ in result.changes)
+            if len(self.model.props) != columns:
+                self._configure_columns()
+            self.grid.render()
+            state['preview'] = None
+            grid.set_rows([])
+            summary.insert('end', f"\n\nApplied {count} changes (Ctrl+Z undoes them in one step)")
+            self.status_var.set(f"Transformed {count} cells")
+
+        buttons = ttk.Frame(win)
+        buttons.pack(fill=tk.X, padx=6, pady=(0, 6))
+        ttk.Button(buttons, text="Preview", style="Compact.TButton", command=run_preview).pack(side=tk.LEFT, padx=2)
+        ttk.Button(buttons, text="Apply", style="Compact.TButton", command=run_apply).pack(side=tk.LEFT, padx=2)
 
     def show_update_history(self):
         if not self.updated_parts:
@@ -485,32 +1023,98 @@ class OrcadLibrarySpreadsheet:
             text.insert('end', p + "\n")
         text.config(state='disabled')
 
+    PERF_REFRESH_MS = 1000
+
+    def show_performance(self):
+        if self.perf_window and self.perf_window.winfo_exists():
+            return self.perf_window.lift()
+        win = self.perf_window = tk.Toplevel(self.root)
+        win.title("Performance")
+        win.geometry("900x560")
+        bar = ttk.Frame(win)
+        bar.pack(fill=tk.X, padx=4, pady=4)
+        counters_var = tk.StringVar()
+        ttk.Label(bar, textvariable=counters_var).pack(side=tk.LEFT)
+
+        capture = tk.StringVar(value=perf.capture_mode() or 'off')
+        box = ttk.Combobox(bar, textvariable=capture, values=('off',) + perf.CAPTURE_MODES, state='readonly', width=8)
+        box.bind('<<ComboboxSelected>>',
+                 lambda e: perf.set_capture(None if capture.get() == 'off' else capture.get()))
+
+        def export():
+            path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON", "*.json")],
+                                                parent=win)
+            if path:
+                perf.write_json(path)
+
+        def reset():
+            perf.reset()
+            refresh(once=True)
+
+        ttk.Button(bar, text="Export JSON...", style="Compact.TButton", command=export).pack(side=tk.RIGHT, padx=2)
+        ttk.Button(bar, text="Reset", style="Compact.TButton", command=reset).pack(side=tk.RIGHT, padx=2)
+        box.pack(side=tk.RIGHT, padx=2)
+        ttk.Label(bar, text="Capture:").pack(side=tk.RIGHT)
+
+        pane = ttk.PanedWindow(win, orient=tk.VERTICAL)
+        pane.pack(fill=tk.BOTH, expand=True)
+        cols = ('Operation', 'Calls', 'Total s', 'Mean ms', 'Max ms', 'Last ms', 'Counters')
+        tree = ttk.Treeview(pane, columns=cols, show='headings', selectmode='browse', height=10)
+        for c in cols:
+            tree.heading(c, text=c)
+            tree.column(c, width=140 if c == 'Operation' else 320 if c == 'Counters' else 70,
+                        anchor='w' if c in ('Operation', 'Counters') else 'e')
+        text = tk.Text(pane, wrap='none', height=12, font=('Courier', 9))
+        pane.add(tree, weight=1)
+        pane.add(text, weight=1)
+
+        def show_capture(event=None):
+            name = tree.focus()
+            st = next((s for s in perf.stats() if s.name == name), None)
+            cap = st.capture if st else None
+            text.delete('1.0', 'end')
+            if not cap:
+                text.insert('end', "No capture for this operation. Pick a capture mode and run it again.")
+                return
+            if 'memory_peak_mb' in cap:
+                text.insert('end', f"Peak traced memory: {cap['memory_peak_mb']} MB\n")
+                text.insert('end', '\n'.join(cap['memory_top']) + '\n\n')
+            text.insert('end', cap.get('profile', ''))
+        tree.bind('<<TreeviewSelect>>', show_capture)
+
+        def refresh(once=False):
+            if not win.winfo_exists():
+                return
+            focus = tree.focus()
+            tree.delete(*tree.get_children())
+            for st in perf.stats():
+                counters = ', '.join(f"{k}={v}" for k, v in sorted(st.counters.items()))
+                tree.insert('', 'end', iid=st.name, values=(
+                    st.name, st.calls, f"{st.total:.3f}", f"{st.total / st.calls * 1e3:.1f}",
+                    f"{st.max * 1e3:.1f}", f"{st.last * 1e3:.1f}", counters))
+            if focus and tree.exists(focus):
+                tree.focus(focus)
+                tree.selection_set(focus)
+            counters_var.set('  '.join(f"{k}: {v}" for k, v in sorted(perf.snapshot()['counters'].items())))
+            if not once:
+                win.after(self.PERF_REFRESH_MS, refresh)
+        refresh()
+
     def update_status(self, event=None):
-        total = len(self.filtered_ids)
-        selected = len(self.table.selection())
+        total = len(self.row_order)
+        selected = len(self.grid.selected)
         updated = len(self.updated_parts)
         filt = getattr(self, 'current_filter', '')
         filter_text = f" | Filter: '{filt}'" if filt else ''
+        if self.value_filter:
+            filter_text += f" | {self.value_filter[0]} = '{self.value_filter[1]}'"
         self.status_var.set(f"Total: {total} | Selected: {selected} | Updated: {updated}{filter_text}")
 
-    def _extract_props(self):
-        names = set()
-        for pkg, libpart in self.parts:
-            defn = pkg.find('Defn'); names.update(defn.attrib.keys())
-            for sup in libpart.findall('.//SymbolUserProp/Defn'):
-                names.add(sup.get('name'))
-        self.props = sorted(names)
-
-    def _extract_template_parts(self, tree):
-        parts = {}; root = tree.getroot()
-        for pkg in root.findall('.//Package'):
-            libpart = pkg.find('LibPart')
-            defn = libpart.find('Defn') if libpart is not None else None
-            pname = defn.get('CellName') if defn is not None else None
-            if not pname: continue
-            sup = {s.get('name'): s.get('val', '') for s in libpart.findall('.//SymbolUserProp/Defn')}
-            parts[pname] = sup
-        return parts
+    def _extract_template_parts(self, tree, with_defn=False):
+        # memoized on the template index until a save changes the template
+        if self.template_index is not None and self.template_index.tree is tree:
+            return self.template_index.template_parts(with_defn)
+        return orcad_xml.extract_template_parts(tree, with_defn)
 
 if __name__ == '__main__':
     root = tk.Tk()
@@ -0,0 +1,64 @@
+import queue
+import threading
+import time
+
+
+class BackgroundJob:
+    """Runs `work(job)` on a worker thread and hands results back to the Tk thread.
+
+    The worker calls `job.emit(item)`; items are delivered to `on_item` from a
+    `root.after` poll so every Tk call stays on the UI thread. `on_done` gets the
+    return value of `work`, `on_error` any exception it raised.
+    """
+    POLL_MS = 30
+    BUDGET_S = 0.05  # max time spent dispatching items per poll
+
+    def __init__(self, root, work, on_item=None, on_done=None, on_error=None):
+        self.root = root
+        self.work = work
+        self.on_item = on_item
+        self.on_done = on_done
+        self.on_error = on_error
+        self.cancelled = False
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        self.root.after(self.POLL_MS, self._poll)
+        return self
+
+    def emit(self, item):
+        self._queue.put(('item', item))
+
+    def cancel(self):
+        self.cancelled = True
+
+    def _run(self):
+        try:
+            result = self.work(self)
+        except Exception as e:
+            self._queue.put(('error', e))
+        else:
+            self._queue.put(('done', result))
+
+    def _poll(self):
+        deadline = time.perf_counter() + self.BUDGET_S
+        while time.perf_counter() < deadline:
+            try:
+                kind, payload = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if self.cancelled:
+                if kind != 'item':
+                    return
+                continue
+            if kind == 'item':
+                if self.on_item: self.on_item(payload)
+            elif kind == 'done':
+                if self.on_done: self.on_done(payload)
+                return
+            else:
+                if self.on_error: self.on_error(payload)
+                return
+        self.root.after(self.POLL_MS, self._poll)
@@ -0,0 +1,118 @@
+"""Process many libraries in parallel and merge them into a cross-library part index.
+
+Each library runs in its own worker process (ProcessPoolExecutor); a failure in one
+library is reported in its result and never stops the others.
+"""
+import csv
+import os
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import csv_io
+import library_cache
+import orcad_xml
+import template_checks
+import template_diff
+import xml_save
+
+DEFAULT_KEYS = ('Value', 'Manufacturer')
+
+
+def process_library(path, keys=DEFAULT_KEYS, template_parts=None, edits=None, output=None, strict=False,
+                    use_cache=True):
+    """Worker: summarize one library; optionally validate/compare against `template_parts`
+    (orcad_xml.extract_template_parts with_defn=True) and apply an `edits` CSV, writing the result
+    to `output`. Never raises."""
+    result = {'path': path, 'error': None, 'parts': 0, 'index': {}}
+    try:
+        table, defn_keys = library_cache.load_table(path) if use_cache else orcad_xml.load_table(path)
+        result['parts'] = len(table)
+        cols = [(k, table.column(k)) for k in keys if table.has_prop(k)]
+        # only the conflict keys travel back to the parent process
+        result['index'] = {name: {k: col[r] for k, col in cols} for r, name in enumerate(table.names)}
+
+        if template_parts is not None:
+            tmpl = template_parts
+            updated, added = template_checks.validate_names([n.strip() for n in table.names], tmpl)
+            result['not_in_template'] = len(added)
+            result['field_diffs'] = template_diff.TemplateDiff(table, tmpl).counts()['parts changed']
+
+        if edits:
+            edit_table = csv_io.read_table(edits)
+            index = xml_save.TemplateIndex(ET.parse(path), source=path)
+            count, _ = xml_save.apply_updates(index, edit_table, range(len(edit_table)), defn_keys, strict)
+            result['updated'] = count
+            result['mode'] = xml_save.write_tree(index, output)
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def run_batch(paths, keys=DEFAULT_KEYS, template=None, edits_dir=None, out_dir=None,
+              strict=False, workers=None, progress=None, use_cache=True):
+    """Run process_library over `paths` on a process pool. Returns results in input order."""
+    # the template is parsed once here rather than once per library
+    # Package Defn attributes are table columns, so they are part of the comparison
+    template_parts = orcad_xml.extract_template_parts(ET.parse(template), with_defn=True) if template else None
+    jobs = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for path in paths:
+            edits = output = None
+            if edits_dir:
+                stem = os.path.splitext(os.path.basename(path))[0]
+                candidate = os.path.join(edits_dir, stem + '.csv')
+                if os.path.exists(candidate):
+                    edits, output = candidate, os.path.join(out_dir or edits_dir, stem + '.xml')
+            jobs[pool.submit(process_library, path, tuple(keys), template_parts, edits, output, strict,
+                             use_cache)] = path
+        results = {}
+        for fut in as_completed(jobs):
+            path = jobs[fut]
+            try:
+                results[path] = fut.result()
+            except Exception as e:  # worker process died (e.g. out of memory)
+                results[path] = {'path': path, 'error': f"{type(e).__name__}: {e}", 'parts': 0, 'index': {}}
+            if progress:
+                progress(results[path])
+    return [results[p] for p in paths]
+
+
+def merge_index(results):
+    # PartName -> [(library path, {key: value})] across every library that has it
+    merged = {}
+    for res in results:
+        for name, values in res['index'].items():
+            merged.setdefault(name, []).append((res['path'], values))
+    return merged
+
+
+def find_conflicts(merged, keys=DEFAULT_KEYS):
+    """[(PartName, key, {value: [library paths]})] where libraries disagree on a non-empty value."""
+    conflicts = []
+    for name in sorted(merged):
+        entries = merged[name]
+        if len(entries) < 2:
+            continue
+        for k in keys:
+            seen = {}
+            for path, values in entries:
+                v = values.get(k, '').strip()
+                if v:
+                    seen.setdefault(v, []).append(path)
+            if len(seen) > 1:
+                conflicts.append((name, k, seen))
+    return conflicts
+
+
+def write_report(path, results, conflicts):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Section', 'PartName', 'Property', 'Value', 'Library', 'Detail'])
+        for res in results:
+            detail = res['error'] or ', '.join(f"{k}={res[k]}" for k in
+                                               ('parts', 'not_in_template', 'field_diffs', 'updated', 'mode') if k in res)
+            writer.writerow(['library', '', '', '', res['path'], detail])
+        for name, k, seen in conflicts:
+            for v, libs in seen.items():
+                for lib in libs:
+                    writer.writerow(['conflict', name, k, v, lib, ''])
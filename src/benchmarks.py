@@ -0,0 +1,283 @@
+"""Benchmarks and synthetic OrCAD libraries.
+
+    python benchmarks.py gen OUT.xml [--parts N] [--props P] [--entropy E] [--seed S]
+    python benchmarks.py run [--sizes 1000 10000 100000] [--ops load_xml,sort,...]
+                             [--json OUT.json] [--baseline BASE.json] [--no-memory]
+
+`run` times each operation on generated libraries (wall time of one run, then peak
+traced memory of a second run) through the same model-layer calls the GUI makes.
+With a display (e.g. under Xvfb) it also times the Tk-bound steps. --baseline exits
+with status 1 when an operation got slower than --tolerance.
+"""
+import argparse
+import gc
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+import csv_io
+import library_cache
+import orcad_xml
+import validators
+import xml_save
+from column_fit import ColumnWidths
+from search_index import SearchIndex
+from sorting import SortKeyCache
+
+SIZES = (1000, 10000, 100000)
+PREFIXES = ('p', 'n', 'u', 'm', '', 'k', 'M')
+UNITS = ('F', 'H', 'V', '', 'Ω')
+WORDS = ('Murata', 'TDK', 'Yageo', 'Vishay', 'Panasonic', 'Kemet', 'Bourns', 'Rohm', 'Samsung', 'TI')
+
+
+def _value(kind, k):
+    # the k-th distinct value of a property: SI values, vendor-like text or part codes
+    if kind == 0:
+        whole = 1 + k % 997
+        frac = f".{k // 997}" if k >= 997 else ''
+        return f"{whole}{frac}{PREFIXES[k % len(PREFIXES)]}{UNITS[k % len(UNITS)]}"
+    if kind == 1:
+        return f"{WORDS[k % len(WORDS)]} {k // len(WORDS)}"
+    return f"MPN-{k:06d}"
+
+
+def synth_library(n_parts, n_props=12, seed=0, entropy=0.01):
+    """OrCAD-shaped XML (Package/Defn + LibPart/Defn + NormalView/SymbolUserProp) as bytes.
+
+    `entropy` sets the distinct values per property as a fraction of the part count:
+    0 gives one value for every part, 1 a different value for nearly every part.
+    """
+    rnd = random.Random(seed)
+    distinct = max(1, int(n_parts * entropy))
+    out = io.StringIO()
+    out.write('<?xml version="1.0" encoding="UTF-8"?>\n<Lib><Packages>\n')
+    for i in range(n_parts):
+        out.write(f'<Package><Defn name="PKG_{i}" pcbFootprint="{rnd.choice(("0402", "0603", "0805"))}" refDes="U?"/>'
+                  f'<LibPart><Defn CellName="PART_{i:06d}"/><NormalView>')
+        for j in range(n_props):
+            out.write(f'<SymbolUserProp><Defn name="Prop{j}" val="{_value(j % 3, rnd.randrange(distinct))}"/>'
+                      f'</SymbolUserProp>')
+        out.write('</NormalView></LibPart></Package>\n')
+    out.write('</Packages></Lib>\n')
+    return out.getvalue().encode('utf-8')
+
+
+def write_library(path, n_parts, n_props=12, seed=0, entropy=0.01):
+    data = synth_library(n_parts, n_props, seed, entropy)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return len(data)
+
+
+class Fixture:
+    """Files and a loaded table for one library size, shared by the operations."""
+
+    def __init__(self, tmp, n_parts, n_props, entropy):
+        self.n = n_parts
+        self.xml = os.path.join(tmp, f'lib_{n_parts}.xml')
+        self.csv = os.path.join(tmp, f'lib_{n_parts}.csv')
+        self.out = os.path.join(tmp, f'out_{n_parts}.xml')
+        write_library(self.xml, n_parts, n_props, entropy=entropy)
+        self.table, self.defn_keys = orcad_xml.load_table(self.xml)
+        csv_io.write_table(self.csv, self.table)
+        self.sort_col = self.table.props[0]
+
+    def edited_table(self, fraction):
+        # freshly loaded table with `fraction` of the parts edited
+        table, defn_keys = orcad_xml.load_table(self.xml)
+        for r in range(0, len(table), max(1, int(1 / fraction))):
+            table.set(r, self.sort_col, 'edited')
+        return table, defn_keys
+
+    def edited_index(self, fraction):
+        # template index with `fraction` of the parts edited and applied, ready to write
+        table, defn_keys = self.edited_table(fraction)
+        index = xml_save.TemplateIndex(ET.parse(self.xml), source=self.xml)
+        xml_save.apply_updates(index, table, sorted(table.dirty), defn_keys)
+        return index
+
+
+def _measure(text):
+    return 7 * len(text)  # headless stand-in for tkfont.Font().measure
+
+
+def _apply_updates(fx):
+    # indexing the template and applying every row (1% edited): the save step before writing
+    tree = ET.parse(fx.xml)
+    table, defn_keys = fx.edited_table(0.01)
+    return lambda: xml_save.apply_updates(xml_save.TemplateIndex(tree), table, range(len(table)), defn_keys)
+
+
+# name -> setup(fixture) returning the timed callable; setup itself is not timed
+OPS = {
+    'load_xml': lambda fx: lambda: orcad_xml.load_table(fx.xml),
+    'load_cached': lambda fx: (library_cache.load_table(fx.xml), lambda: library_cache.load_table(fx.xml))[1],
+    'import_csv': lambda fx: lambda: csv_io.read_table(fx.csv),
+    'export_csv': lambda fx: lambda: csv_io.write_table(fx.csv + '.out', fx.table),
+    'search': lambda fx: lambda: SearchIndex(fx.table).search('10k'),
+    'sort': lambda fx: lambda: SortKeyCache(fx.table).order([(fx.sort_col, False)]),
+    'fit_columns': lambda fx: (lambda w: lambda: [w.fit(c) for c in fx.table.header()])(
+        ColumnWidths(fx.table, _measure)),
+    'validate': lambda fx: lambda: validators.validate(fx.table, validators.DEFAULT_RULES, workers=1),
+    'apply_updates': _apply_updates,
+    'save_full': lambda fx: (lambda index: lambda: xml_save.write_tree(index, fx.out))(
+        xml_save.TemplateIndex(ET.parse(fx.xml))),
+    'save_patched': lambda fx: (lambda index: lambda: xml_save.write_tree(index, fx.out))(fx.edited_index(0.01)),
+}
+
+
+def _gui_ops(root):
+    # Tk-bound steps, only with a display: grid population and real font measurement
+    from tkinter import ttk
+    import tkinter.font as tkfont
+    from virtual_grid import VirtualGrid
+
+    def populate(fx):
+        tree = ttk.Treeview(root, columns=fx.table.header(), show='headings', height=40)
+        grid = VirtualGrid(tree, fx.table.row)
+        grid.height = 40
+
+        def run():
+            grid.set_rows(list(range(len(fx.table))))
+            root.update_idletasks()
+        return run
+
+    font = tkfont.Font(root=root)
+    return {
+        'populate_table': populate,
+        'fit_columns_tk': lambda fx: (lambda w: lambda: [w.fit(c) for c in fx.table.header()])(
+            ColumnWidths(fx.table, font.measure)),
+    }
+
+
+def _tk_root():
+    if not os.environ.get('DISPLAY') and sys.platform.startswith('linux'):
+        return None
+    try:
+        import tkinter
+        root = tkinter.Tk()
+        root.withdraw()
+        return root
+    except Exception:
+        return None
+
+
+def run_op(setup, fx, memory=True):
+    """(wall seconds, peak traced MB or None) for one operation on a fresh setup."""
+    fn = setup(fx)
+    gc.collect()
+    t0 = time.perf_counter()
+    fn()
+    wall = time.perf_counter() - t0
+    if not memory:
+        return wall, None
+    # a second run under tracemalloc, which would distort the timing above
+    fn = setup(fx)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return wall, peak / 1e6
+
+
+def run(sizes=SIZES, ops=None, n_props=12, entropy=0.01, memory=True, out=print):
+    root = _tk_root()
+    table = dict(OPS)
+    if root is not None:
+        table.update(_gui_ops(root))
+    names = [o for o in (ops or table) if o in table]
+    results = []
+    with tempfile.TemporaryDirectory() as tmp, _private_cache(tmp):
+        out(f"{'operation':<16} {'parts':>8} {'wall s':>9} {'us/part':>9} {'peak MB':>9}")
+        for n in sizes:
+            fx = Fixture(tmp, n, n_props, entropy)
+            for name in names:
+                wall, peak = run_op(table[name], fx, memory)
+                results.append({'op': name, 'parts': n, 'wall_s': round(wall, 4),
+                                'peak_mb': None if peak is None else round(peak, 2)})
+                out(f"{name:<16} {n:>8} {wall:>9.3f} {wall / n * 1e6:>9.1f} "
+                    f"{'-' if peak is None else f'{peak:.1f}':>9}")
+    if root is not None:
+        root.destroy()
+    return results
+
+
+class _private_cache:
+    # keep benchmark libraries out of the user's parse cache
+    def __init__(self, tmp):
+        self.path = os.path.join(tmp, 'cache')
+
+    def __enter__(self):
+        self.saved = os.environ.get('ORCAD_LIBMGR_CACHE')
+        os.environ['ORCAD_LIBMGR_CACHE'] = self.path
+
+    def __exit__(self, *exc):
+        if self.saved is None:
+            os.environ.pop('ORCAD_LIBMGR_CACHE', None)
+        else:
+            os.environ['ORCAD_LIBMGR_CACHE'] = self.saved
+
+
+def regressions(results, baseline, tolerance):
+    """[(op, parts, baseline s, now s)] for operations slower than baseline * (1 + tolerance)."""
+    base = {(b['op'], b['parts']): b['wall_s'] for b in baseline}
+    slow = []
+    for r in results:
+        b = base.get((r['op'], r['parts']))
+        if b is not None and r['wall_s'] > b * (1 + tolerance) and r['wall_s'] - b > 0.005:
+            slow.append((r['op'], r['parts'], b, r['wall_s']))
+    return slow
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='benchmarks', description=__doc__.split('\n\n')[0])
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('gen', help="write a synthetic library")
+    p.add_argument('output')
+    p.add_argument('--parts', type=int, default=1000)
+    p.add_argument('--props', type=int, default=12)
+    p.add_argument('--entropy', type=float, default=0.01, help="distinct values per property / parts (0..1)")
+    p.add_argument('--seed', type=int, default=0)
+
+    p = sub.add_parser('run', help="time operations at several library sizes")
+    p.add_argument('--sizes', type=int, nargs='+', default=list(SIZES))
+    p.add_argument('--ops', help="comma-separated subset of: " + ', '.join(OPS) + ", populate_table, fit_columns_tk")
+    p.add_argument('--props', type=int, default=12)
+    p.add_argument('--entropy', type=float, default=0.01)
+    p.add_argument('--no-memory', action='store_true', help="skip the tracemalloc run")
+    p.add_argument('--json', help="write results to this file")
+    p.add_argument('--baseline', help="earlier --json results to compare against")
+    p.add_argument('--tolerance', type=float, default=0.25, help="allowed slowdown vs the baseline (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    if args.command == 'gen':
+        size = write_library(args.output, args.parts, args.props, args.seed, args.entropy)
+        print(f"Wrote {args.parts} parts ({size / 1e6:.1f} MB) to {args.output}")
+        return 0
+
+    ops = args.ops.split(',') if args.ops else None
+    results = run(args.sizes, ops, args.props, args.entropy, memory=not args.no_memory)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=1)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            slow = regressions(results, json.load(f), args.tolerance)
+        for op, n, before, now in slow:
+            print(f"REGRESSION {op} @ {n}: {before:.3f}s -> {now:.3f}s")
+        return 1 if slow else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""Column auto-fit widths with a string -> pixel cache (the measure function is injected)."""
+import heapq
+
+CANDIDATES = 32       # longest strings (by characters) actually measured per column
+SAMPLE_ROWS = 20000   # percentile mode looks at a stride sample of this many rows
+HEADER_PAD = 20
+CELL_PAD = 10
+
+
+class ColumnWidths:
+    """Per-column content widths for auto-fit.
+
+    Only the longest few distinct strings of a column are measured: the widest string
+    in pixels is practically always among the longest in characters. Results are kept
+    per column and follow edits and appended rows through a PartTable observer.
+    With `percentile` (e.g. 0.98) the width ignores the longest outliers instead.
+    """
+
+    def __init__(self, table, measure, percentile=None):
+        self.table = table
+        self.measure = measure
+        self.percentile = percentile
+        self._px = {}      # string -> measured width
+        self._max = {}     # column -> [content width, rows covered, edited strings not yet measured]
+        table.observers.append(self._on_set)
+
+    def close(self):
+        if self._on_set in self.table.observers:
+            self.table.observers.remove(self._on_set)
+
+    def width(self, text):
+        px = self._px.get(text)
+        if px is None:
+            px = self._px[text] = self.measure(text)
+        return px
+
+    def _widest(self, strings):
+        longest = heapq.nlargest(CANDIDATES, strings, key=len)
+        return max((self.width(s) for s in longest), default=0)
+
+    def content_width(self, col):
+        values = self.table.column(col)
+        if self.percentile is not None:
+            return self._percentile_width(values)
+        entry = self._max.get(col)
+        if entry is None:
+            entry = self._max[col] = [0, 0, set()]
+        if entry[1] < len(values):
+            # rows appended since the last fit (import, streaming load)
+            entry[2].update(self.table.distinct(col, entry[1]))
+            entry[1] = len(values)
+        if entry[2]:
+            entry[0] = max(entry[0], self._widest(entry[2]))
+            entry[2].clear()
+        return entry[0]
+
+    def _percentile_width(self, values):
+        step = max(1, len(values) // SAMPLE_ROWS)
+        sample = sorted(set(values[::step]), key=len)
+        if not sample:
+            return 0
+        cut = sample[:int(len(sample) * self.percentile) + 1]
+        return self._widest(cut)
+
+    def fit(self, col):
+        return max(self.width(col) + HEADER_PAD, self.content_width(col) + CELL_PAD)
+
+    def _on_set(self, r, prop, old, new):
+        # no measuring here, so bulk edits stay cheap; strings are measured on the next fit
+        entry = self._max.get(prop)
+        if entry is None or r >= entry[1]:
+            return
+        if self._px.get(old, -1) >= entry[0]:
+            # the widest cell may have shrunk; recompute on the next fit
+            del self._max[prop]
+        elif new:
+            entry[2].add(new)
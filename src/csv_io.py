@@ -0,0 +1,167 @@
+"""CSV <-> PartTable (no Tk dependency).
+
+Files are streamed in chunks of rows. The encoding and delimiter are sniffed from
+the first block of the file (UTF-8 with or without BOM, UTF-16 BOM, or Excel's
+CP1252; `,` `;` tab or `|`), which is then parsed from the same open handle.
+"""
+import codecs
+import csv
+import io
+import os
+
+from part_table import PartTable, PARTNAME
+
+CHUNK_ROWS = 2000
+SNIFF_BYTES = 64 * 1024
+DELIMITERS = ',;\t|'
+
+
+def _cp1252_fallback(exc):
+    # a UTF-8 file with stray Excel bytes further down: decode just those bytes as CP1252
+    bad = exc.object[exc.start:exc.end]
+    return bad.decode('cp1252', errors='replace'), exc.end
+
+
+codecs.register_error('orcad_cp1252', _cp1252_fallback)
+
+
+class CsvFormat:
+    """How a CSV file is encoded and delimited, so an export can match its import."""
+
+    def __init__(self, encoding='utf-8', delimiter=',', bom=False):
+        self.encoding = encoding
+        self.delimiter = delimiter
+        self.bom = bom
+
+    def __repr__(self):
+        return f"CsvFormat({self.encoding!r}, {self.delimiter!r}, bom={self.bom})"
+
+
+def sniff(head):
+    """CsvFormat for a file starting with the bytes `head`."""
+    if head.startswith(codecs.BOM_UTF8):
+        fmt = CsvFormat('utf-8', bom=True)
+        text = head[len(codecs.BOM_UTF8):].decode('utf-8', errors='ignore')
+    elif head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        fmt = CsvFormat('utf-16', bom=True)
+        text = head[:len(head) & ~1].decode('utf-16', errors='ignore')
+    else:
+        try:
+            # final=False: the block may end inside a multi-byte character
+            text = codecs.getincrementaldecoder('utf-8')().decode(head, final=False)
+            fmt = CsvFormat('utf-8')
+        except UnicodeDecodeError:
+            text = head.decode('cp1252', errors='replace')
+            fmt = CsvFormat('cp1252')
+    fmt.delimiter = _sniff_delimiter(text)
+    return fmt
+
+
+def _sniff_delimiter(text):
+    lines = text.splitlines()
+    if len(lines) > 1 and len(text) >= SNIFF_BYTES // 2:
+        lines = lines[:-1]  # the last line of a block is usually cut short
+    sample = '\n'.join(lines[:50])
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=DELIMITERS).delimiter
+    except csv.Error:
+        header = lines[0] if lines else ''
+        return max(DELIMITERS, key=header.count) if any(d in header for d in DELIMITERS) else ','
+
+
+class CsvReader:
+    """Streams a CSV file as chunks of stripped rows.
+
+    `header` is available after construction; iterating yields lists of up to
+    `chunk` rows; `progress()` is the fraction of the file consumed so far.
+    """
+
+    def __init__(self, path, chunk=CHUNK_ROWS):
+        self.chunk = chunk
+        self.size = os.path.getsize(path) or 1
+        self.text = None
+        # the sniffed block stays in the read buffer, so no byte is read from disk twice
+        self.raw = open(path, 'rb', buffering=SNIFF_BYTES)
+        try:
+            self.format = sniff(self.raw.peek(SNIFF_BYTES)[:SNIFF_BYTES])
+            errors = 'orcad_cp1252' if self.format.encoding == 'utf-8' else 'strict'
+            encoding = 'utf-8-sig' if self.format.encoding == 'utf-8' else self.format.encoding
+            self.text = io.TextIOWrapper(self.raw, encoding=encoding, errors=errors, newline='')
+            self.reader = csv.reader(self.text, delimiter=self.format.delimiter)
+            self.header = [cell.strip() for cell in next(self.reader, [])]
+        except Exception:
+            self.raw.close()
+            raise
+        if PARTNAME not in self.header:
+            self.close()
+            raise ValueError("Missing 'PartName'")
+
+    def __iter__(self):
+        chunk = []
+        for row in self.reader:
+            chunk.append([cell.strip() for cell in row])
+            if len(chunk) >= self.chunk:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def progress(self):
+        return min(1.0, self.raw.tell() / self.size)
+
+    def close(self):
+        (self.text or self.raw).close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_table(path):
+    with CsvReader(path) as reader:
+        table = PartTable()
+        table.extend_rows(reader.header, ())
+        for chunk in reader:
+            table.extend_rows(reader.header, chunk)
+    return table
+
+
+def iter_write(path, table, rows=None, fmt=None, chunk=CHUNK_ROWS):
+    """Write `rows` (model rows in output order; default all) in chunks, yielding the
+    number written so far after each. The file appears under `path` only once the
+    generator runs to completion; closing it early leaves `path` untouched.
+
+    `fmt` keeps the delimiter and encoding of an imported file, except that CP1252
+    is written as UTF-8 with BOM: Excel opens it the same way and it holds any value."""
+    order = range(len(table)) if rows is None else rows
+    fmt = fmt or CsvFormat()
+    if fmt.encoding == 'cp1252' or (fmt.encoding == 'utf-8' and fmt.bom):
+        encoding = 'utf-8-sig'
+    else:
+        encoding = fmt.encoding
+    # columns added while the export runs (a streaming load, a rename) stay out of it
+    header, columns = table.header(), list(table.columns)
+    tmp = path + '.tmp'
+    done = False
+    try:
+        with open(tmp, 'w', newline='', encoding=encoding) as f:
+            writer = csv.writer(f, delimiter=fmt.delimiter)
+            writer.writerow(header)
+            for start in range(0, len(order), chunk):
+                writer.writerows(table.rows(order[start:start + chunk], columns))
+                yield min(start + chunk, len(order))
+        os.replace(tmp, path)
+        done = True
+    finally:
+        if not done and os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def write_table(path, table, rows=None, fmt=None):
+    # returns the number of rows written
+    written = 0
+    for written in iter_write(path, table, rows, fmt):
+        pass
+    return written
@@ -0,0 +1,222 @@
+"""Undo/redo journal for PartTable edits with a crash-recovery sidecar (no Tk dependency).
+
+Every change made through PartTable.set() is recorded as (row, property id, old, new).
+Each step is a list of records; a single edit is one step and edits made inside
+`with journal.group():` form one. Undo and redo move a cursor over the steps.
+
+With a source file the applied changes are also appended to a sidecar file under
+the cache directory, fsync'd by sync(). After a crash, pending() reads them back
+and recover() replays them onto the freshly loaded source. The sidecar is only
+trusted while the source file still has the size and mtime it was written against.
+"""
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+
+import library_cache
+
+JOURNAL_VERSION = 1
+SYNC_S = 2.0  # sync() writes to disk at most this often unless forced
+
+
+def sidecar_path(source):
+    key = hashlib.sha1(os.path.abspath(source).encode('utf-8')).hexdigest()
+    return os.path.join(library_cache.cache_dir(), 'journal', key + '.jsonl')
+
+
+def _header(source):
+    st = os.stat(source)
+    return ['h', JOURNAL_VERSION, os.path.abspath(source), st.st_size, st.st_mtime_ns]
+
+
+class Journal:
+
+    def __init__(self, table, source=None):
+        self.table = table
+        self.source = source
+        self.steps = []        # [[(row, prop id, old, new), ...], ...]
+        self.pos = 0           # steps[:pos] are applied, steps[pos:] can be redone
+        self.prop_ids = {}     # property name -> id
+        self.prop_names = []
+        self._group = None     # records of the open group
+        self._depth = 0
+        self._applying = False
+        self._file = None
+        self._synced = time.monotonic()
+        self._unsynced = False
+        table.observers.append(self._on_set)
+
+    def close(self):
+        """Stop recording; the sidecar is left on disk."""
+        if self._on_set in self.table.observers:
+            self.table.observers.remove(self._on_set)
+        self._close_file()
+
+    def _close_file(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def attach(self, source):
+        """Persist further changes in a sidecar for `source`, the file the table now matches.
+        The sidecar is (re)written from the first change on."""
+        self._close_file()
+        self.source = source
+
+    def discard(self):
+        """Delete the sidecar (clean shutdown, or its edits are saved or abandoned)."""
+        self._close_file()
+        if self.source:
+            try:
+                os.remove(sidecar_path(self.source))
+            except OSError:
+                pass
+
+    def rebase(self, source, keep=None):
+        """After a save to `source`: drop the old sidecar and continue against the new file,
+        keeping the in-memory undo history. `keep` ({row: properties}, e.g. edits made while
+        the save ran) is carried over to the new sidecar with the table's current values."""
+        self.discard()
+        self.attach(source)
+        for r, props in sorted((keep or {}).items()):
+            for prop in sorted(props):
+                val = self.table.get(r, prop)
+                self._log(['s', r, self._pid(prop), val, val])
+
+    def _pid(self, prop):
+        pid = self.prop_ids.get(prop)
+        if pid is None:
+            pid = self.prop_ids[prop] = len(self.prop_names)
+            self.prop_names.append(prop)
+            self._log(['p', pid, prop])
+        return pid
+
+    def _on_set(self, r, prop, old, new):
+        if self._applying:
+            return
+        rec = (r, self._pid(prop), old, new)
+        self._log(['s', *rec])
+        if self._group is not None:
+            self._group.append(rec)
+            return
+        self._push([rec])
+
+    def _push(self, step):
+        del self.steps[self.pos:]  # a new edit drops the redo branch
+        self.steps.append(step)
+        self.pos += 1
+
+    @contextmanager
+    def group(self):
+        """Edits inside the block become a single undo step (nesting is allowed)."""
+        if self._depth == 0:
+            self._group = []
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                step, self._group = self._group, None
+                if step:
+                    self._push(step)
+
+    def can_undo(self):
+        return self.pos > 0
+
+    def can_redo(self):
+        return self.pos < len(self.steps)
+
+    def undo(self):
+        """Revert the last step; returns its records (empty if there is nothing to undo)."""
+        if not self.can_undo():
+            return []
+        self.pos -= 1
+        step = self.steps[self.pos]
+        self._apply((r, pid, new, old) for r, pid, old, new in reversed(step))
+        return step
+
+    def redo(self):
+        if not self.can_redo():
+            return []
+        step = self.steps[self.pos]
+        self.pos += 1
+        self._apply(step)
+        return step
+
+    def _apply(self, records):
+        self._applying = True
+        try:
+            for r, pid, old, new in records:
+                self.table.set(r, self.prop_names[pid], new)
+                # the sidecar records what was applied, so replay needs no undo bookkeeping
+                self._log(['s', r, pid, old, new])
+        finally:
+            self._applying = False
+
+    # --- sidecar ---
+
+    def _log(self, entry):
+        if not self.source:
+            return
+        try:
+            if self._file is None:
+                path = sidecar_path(self.source)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                self._file = open(path, 'w', encoding='utf-8')
+                self._file.write(json.dumps(_header(self.source)) + '\n')
+                for pid, name in enumerate(self.prop_names):
+                    self._file.write(json.dumps(['p', pid, name], ensure_ascii=False) + '\n')
+            self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self._unsynced = True
+        except OSError:
+            self.source = None  # keep undo/redo working without the sidecar
+
+    def sync(self, force=False):
+        """Flush and fsync the sidecar if there is anything new (at most every SYNC_S)."""
+        if not self._file or not self._unsynced:
+            return False
+        if not force and time.monotonic() - self._synced < SYNC_S:
+            return False
+        try:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        except OSError:
+            return False
+        self._synced = time.monotonic()
+        self._unsynced = False
+        return True
+
+    def recover(self, changes):
+        """Apply pending() changes as one undo step; returns the number applied."""
+        n = len(self.table)
+        with self.group():
+            for r, prop, val in changes:
+                if r < n:
+                    self.table.set(r, prop, val)
+        return len(changes)
+
+
+def pending(source):
+    """Changes a crashed session left for `source`: [(row, property, new value)], or []."""
+    try:
+        header = _header(source)
+        with open(sidecar_path(source), encoding='utf-8') as f:
+            lines = iter(f)
+            if json.loads(next(lines)) != header:
+                return []
+            names, changes = {}, []
+            for line in lines:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break  # torn last line from the crash
+                if entry[0] == 'p':
+                    names[entry[1]] = entry[2]
+                elif entry[0] == 's':
+                    changes.append((entry[1], names[entry[2]], entry[4]))
+            return changes
+    except (OSError, StopIteration, ValueError, KeyError, IndexError):
+        return []
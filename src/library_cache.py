@@ -0,0 +1,180 @@
+"""On-disk cache of parsed libraries, so unchanged files reopen without re-parsing XML.
+
+One file per library path under $ORCAD_LIBMGR_CACHE (default ~/.cache/orcad-libmgr).
+Each holds a JSON header line (size, mtime, content hash), a JSON line with the part
+names and each column's distinct values, then every column's codes as raw array
+bytes. Nothing in it is executed on load, so a shared cache directory is safe to read.
+A size+mtime match is trusted; a size match with a different mtime falls back to
+comparing the content hash.
+"""
+import hashlib
+import json
+import os
+import sys
+from array import array
+
+import orcad_xml
+from part_table import Column, PartTable
+
+CACHE_VERSION = 2
+CODES = f"{sys.byteorder}/{array('I').itemsize}"  # layout of the raw code arrays
+
+
+def cache_dir():
+    return os.environ.get('ORCAD_LIBMGR_CACHE') or os.path.join(os.path.expanduser('~'), '.cache', 'orcad-libmgr')
+
+
+def cache_path(path):
+    key = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir(), key + '.bin')
+
+
+def file_hash(path):
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class HashingReader:
+    """File wrapper that hashes everything read through it (lets the parser hash for free)."""
+
+    def __init__(self, f):
+        self.f = f
+        self.h = hashlib.blake2b(digest_size=20)
+
+    def read(self, n=-1):
+        data = self.f.read(n)
+        self.h.update(data)
+        return data
+
+    def tell(self):
+        return self.f.tell()
+
+    def finish(self):
+        # iterparse may stop before EOF; hash the rest so the digest covers the whole file
+        for chunk in iter(lambda: self.read(1 << 20), b''):
+            pass
+        return self.h.hexdigest()
+
+
+class Encoder:
+    """Accumulates part records as dictionary-encoded columns (distinct values + codes)."""
+
+    def __init__(self):
+        self.names = []
+        self.defn_keys = set()
+        self.cols = {}  # prop -> Column
+
+    def add(self, record):
+        pname, attr_map, user_map = record
+        r = len(self.names)
+        self.names.append('' if pname is None else str(pname))
+        self.defn_keys.update(attr_map)
+        merged = {**attr_map, **user_map}
+        for p, v in merged.items():
+            col = self.cols.get(p)
+            if col is None:
+                col = self.cols[p] = Column(r)
+            col.append('' if v is None else str(v))
+        for col in self.cols.values():
+            if len(col) == r:
+                col.append('')  # property missing from this part
+
+    def payload(self):
+        props = sorted(self.cols)
+        return {'names': self.names, 'defn_keys': sorted(self.defn_keys),
+                'props': [(p, self.cols[p].values, self.cols[p].codes.tobytes()) for p in props]}
+
+
+def dump_payload(payload):
+    meta = {'names': payload['names'], 'defn_keys': payload['defn_keys'],
+            'props': [(p, values) for p, values, _ in payload['props']]}
+    # JSON escapes newlines inside strings, so the first b'\n' ends the line
+    return b''.join([json.dumps(meta, ensure_ascii=False).encode('utf-8'), b'\n']
+                    + [raw for _, _, raw in payload['props']])
+
+
+def load_payload(data):
+    end = data.index(b'\n')
+    meta = json.loads(data[:end])
+    size = len(meta['names']) * array('I').itemsize
+    if len(data) - end - 1 != size * len(meta['props']):
+        raise ValueError("Truncated cache entry")
+    codes = memoryview(data)[end + 1:]
+    props = [(p, values, codes[i * size:(i + 1) * size]) for i, (p, values) in enumerate(meta['props'])]
+    return {'names': meta['names'], 'defn_keys': meta['defn_keys'], 'props': props}
+
+
+def decode(payload):
+    columns = []
+    for p, values, raw in payload['props']:
+        codes = array('I')
+        codes.frombytes(raw)
+        columns.append(Column.encoded(values, codes))
+    table = PartTable.from_columns(payload['names'], [p for p, _, _ in payload['props']], columns)
+    return table, set(payload['defn_keys'])
+
+
+def lookup(path):
+    """(PartTable, defn_keys) from the cache if it still matches `path`, else None."""
+    try:
+        st = os.stat(path)
+        with open(cache_path(path), 'rb') as f:
+            header = json.loads(f.readline())
+            if header.get('version') != CACHE_VERSION or header.get('codes') != CODES \
+                    or header['size'] != st.st_size:
+                return None
+            if header['mtime_ns'] == st.st_mtime_ns:
+                return decode(load_payload(f.read()))
+            if header['hash'] != file_hash(path):
+                return None
+            raw = f.read()
+        # same content under a new mtime (touched, copied, checked out): record the new mtime
+        # so later opens trust size+mtime again instead of re-hashing the file
+        header['mtime_ns'] = st.st_mtime_ns
+        _write_entry(path, header, raw)
+        return decode(load_payload(raw))
+    except (OSError, KeyError, IndexError, TypeError, ValueError, AttributeError):
+        return None  # missing, stale, foreign or damaged entry: parse the XML again
+
+
+def store(path, stat, digest, encoder):
+    """Write the cache entry; `stat`/`digest` describe the file as it was parsed. Errors are ignored."""
+    header = {'version': CACHE_VERSION, 'codes': CODES, 'path': os.path.abspath(path), 'size': stat.st_size,
+              'mtime_ns': stat.st_mtime_ns, 'hash': digest}
+    _write_entry(path, header, dump_payload(encoder.payload()))
+
+
+def _write_entry(path, header, payload):
+    # `payload` is the dump_payload() bytes; errors are ignored
+    target = cache_path(path)
+    tmp = target + f'.{os.getpid()}.tmp'
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(tmp, 'wb') as f:
+            f.write(json.dumps(header, ensure_ascii=False).encode('utf-8') + b'\n')
+            f.write(payload)
+        os.replace(tmp, target)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+def load_table(path):
+    """Cached equivalent of orcad_xml.load_table(path)."""
+    cached = lookup(path)
+    if cached:
+        return cached
+    st = os.stat(path)
+    enc = Encoder()
+    with open(path, 'rb') as raw:
+        reader = HashingReader(raw)
+        for rec in orcad_xml.iter_part_records(reader):
+            enc.add(rec)
+        digest = reader.finish()
+    store(path, st, digest, enc)
+    return decode(enc.payload())
@@ -0,0 +1,214 @@
+"""Headless command line for OrCAD library round-trips (no tkinter import).
+
+    python orcad_libmgr.py export   LIB.xml -o OUT.csv
+    python orcad_libmgr.py import   EDITS.csv -t TEMPLATE.xml -o OUT.xml [--strict] [--library LIB.xml]
+    python orcad_libmgr.py save     LIB.xml -t TEMPLATE.xml -o OUT.xml [--strict]
+    python orcad_libmgr.py validate EDITS.csv [-t TEMPLATE.xml] [--rules RULES.json] [--allow-new]
+    python orcad_libmgr.py compare  EDITS.csv -t TEMPLATE.xml [-o DIFF.csv]
+    python orcad_libmgr.py transform LIB.xml|EDITS.csv --pack RULES.json -o OUT.csv [--dry-run]
+    python orcad_libmgr.py batch    LIB.xml ... [-t TEMPLATE.xml] [--edits DIR --out-dir DIR] [--report R.csv] [-j N]
+
+Exit status: 0 on success, 1 when validate/compare/batch find problems, 2 on usage or input errors.
+"""
+import argparse
+import glob
+import sys
+import xml.etree.ElementTree as ET
+
+import batch
+import csv_io
+import library_cache
+import orcad_xml
+import template_checks
+import template_diff
+import transforms
+import validators
+import xml_save
+
+EXIT_OK, EXIT_FAILED, EXIT_ERROR = 0, 1, 2
+
+
+def load_library(path, args):
+    if getattr(args, 'no_cache', False):
+        return orcad_xml.load_table(path)
+    return library_cache.load_table(path)
+
+
+def load_source(path, args):
+    # -> (PartTable, Defn keys or None); CSV or library XML by extension
+    if path.lower().endswith('.csv'):
+        return csv_io.read_table(path), None
+    return load_library(path, args)
+
+
+def cmd_export(args):
+    table, _ = load_library(args.library, args)
+    count = csv_io.write_table(args.output, table)
+    print(f"Exported {count} rows to {args.output}")
+    return EXIT_OK
+
+
+def cmd_save(args):
+    table, defn_keys = load_source(args.source, args)
+    if args.library:
+        _, defn_keys = load_library(args.library, args)
+    tree = ET.parse(args.template)
+    index = xml_save.TemplateIndex(tree, source=args.template)
+    if defn_keys is None:
+        defn_keys = index.defn_keys()
+    count, skipped = xml_save.apply_updates(index, table, range(len(table)), defn_keys, strict=args.strict)
+    if args.verbose:
+        for pname in skipped:
+            print(f"Skipping: '{pname}' not found in update map", file=sys.stderr)
+    mode = xml_save.write_tree(index, args.output)
+    print(f"Updated {count} parts to {args.output} ({mode})")
+    return EXIT_OK
+
+
+def cmd_transform(args):
+    table, _ = load_source(args.source, args)
+    rules = []
+    for pack in args.pack or ():
+        rules.extend(transforms.load_pack(pack) if pack not in transforms.PRESETS else
+                     [transforms.rule_from_spec(s) for s in transforms.PRESETS[pack]])
+    if not rules:
+        raise ValueError("No rules given (--pack)")
+    result = transforms.preview(table, rules)
+    print(result.summary())
+    if args.dry_run:
+        return EXIT_OK
+    if not args.output:
+        raise ValueError("-o/--output is required unless --dry-run")
+    transforms.apply(table, result)
+    count = csv_io.write_table(args.output, table)
+    print(f"Wrote {count} rows to {args.output}")
+    return EXIT_OK
+
+
+def cmd_validate(args):
+    if not args.template and not args.rules:
+        raise ValueError("validate needs -t/--template and/or --rules")
+    table, _ = load_source(args.source, args)
+    failed = False
+    if args.rules:
+        report = validators.validate(table, validators.load_rules(args.rules), workers=args.jobs)
+        for r, col, rule, msg in report.errors:
+            print(f"row {r + 1} {table.name(r)!r} {col}: {msg} [{rule}]")
+        print(report.summary())
+        if args.report:
+            report.write_csv(args.report, table)
+        failed = bool(len(report))
+    if args.template:
+        tmpl = orcad_xml.extract_template_parts(ET.parse(args.template))
+        updated, added = template_checks.validate_names([n.strip() for n in table.names], tmpl)
+        print(template_checks.validation_message(updated, added))
+        failed = failed or bool(added and not args.allow_new)
+    return EXIT_FAILED if failed else EXIT_OK
+
+
+def cmd_compare(args):
+    table, _ = load_source(args.source, args)
+    tmpl = orcad_xml.extract_template_parts(ET.parse(args.template), with_defn=True)
+    diff = template_diff.TemplateDiff(table, tmpl)
+    if not len(diff):
+        print("Table and template match exactly.")
+        return EXIT_OK
+    if args.output:
+        diff.write(args.output)
+    else:
+        for kind, pname, prop, old, new in diff.changes:
+            print(f"{kind}: {pname}" + (f" {prop}: {old!r} -> {new!r}" if prop else ''))
+    print(diff.summary())
+    return EXIT_FAILED
+
+
+def cmd_batch(args):
+    paths = [p for pattern in args.libraries for p in (sorted(glob.glob(pattern)) or [pattern])]
+    keys = [k.strip() for k in args.keys.split(',') if k.strip()]
+
+    def progress(res):
+        status = f"ERROR {res['error']}" if res['error'] else f"{res['parts']} parts"
+        print(f"{res['path']}: {status}", file=sys.stderr)
+
+    results = batch.run_batch(paths, keys, template=args.template, edits_dir=args.edits,
+                              out_dir=args.out_dir, strict=args.strict, workers=args.jobs, progress=progress,
+                              use_cache=not args.no_cache)
+    conflicts = batch.find_conflicts(batch.merge_index(results), keys)
+    for name, k, seen in conflicts:
+        print(f"{name}: {k} differs: " + "; ".join(f"{v!r} in {len(libs)} lib(s)" for v, libs in seen.items()))
+    if args.report:
+        batch.write_report(args.report, results, conflicts)
+
+    failed = [r for r in results if r['error']]
+    invalid = [r for r in results if r.get('not_in_template')]
+    print(f"{len(results)} libraries, {sum(r['parts'] for r in results)} parts, "
+          f"{len(failed)} failed, {len(invalid)} with parts missing from template, {len(conflicts)} conflicts")
+    return EXIT_FAILED if failed or invalid or conflicts else EXIT_OK
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='orcad-libmgr', description="OrCAD symbol library batch tool")
+    parser.add_argument('--no-cache', action='store_true', help="always re-parse library XML (skip the parse cache)")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('export', help="library XML -> CSV")
+    p.add_argument('library')
+    p.add_argument('-o', '--output', required=True)
+    p.set_defaults(func=cmd_export)
+
+    for name, src_help in (('import', "edited CSV"), ('save', "edited library XML or CSV")):
+        p = sub.add_parser(name, help=f"apply {src_help} to a template and write XML")
+        p.add_argument('source')
+        p.add_argument('-t', '--template', required=True)
+        p.add_argument('-o', '--output', required=True)
+        p.add_argument('--strict', action='store_true', help="drop empty SymbolUserProps (Strict Save)")
+        p.add_argument('--library', help="library XML whose Package Defn attributes classify columns")
+        p.add_argument('-v', '--verbose', action='store_true')
+        p.set_defaults(func=cmd_save)
+
+    p = sub.add_parser('validate', help="check part names against a template and/or a rule set")
+    p.add_argument('source')
+    p.add_argument('-t', '--template')
+    p.add_argument('--rules', help="JSON rule set (required, enum, pattern, cross, unique checks)")
+    p.add_argument('--report', help="write the rule violations to this CSV")
+    p.add_argument('-j', '--jobs', type=int, help="worker processes for very large tables")
+    p.add_argument('--allow-new', action='store_true', help="parts missing from the template are not failures")
+    p.set_defaults(func=cmd_validate)
+
+    p = sub.add_parser('compare', help="diff parts, properties and values against a template")
+    p.add_argument('source')
+    p.add_argument('-t', '--template', required=True)
+    p.add_argument('-o', '--output', help="write the diff to this .csv or .json file instead of stdout")
+    p.set_defaults(func=cmd_compare)
+
+    p = sub.add_parser('transform', help="apply rule packs (replace, case, units, rename) and write CSV")
+    p.add_argument('source')
+    p.add_argument('--pack', action='append', help="rule pack JSON file or preset name; repeatable, applied in order")
+    p.add_argument('-o', '--output', help="CSV file to write")
+    p.add_argument('--dry-run', action='store_true', help="only report what would change")
+    p.set_defaults(func=cmd_transform)
+
+    p = sub.add_parser('batch', help="process many libraries in parallel and report cross-library conflicts")
+    p.add_argument('libraries', nargs='+', help="library XML files or glob patterns")
+    p.add_argument('-t', '--template', help="validate/compare every library against this template")
+    p.add_argument('--edits', help="directory of <library>.csv edits to apply")
+    p.add_argument('--out-dir', help="where edited libraries are written (default: --edits)")
+    p.add_argument('--strict', action='store_true')
+    p.add_argument('--keys', default=','.join(batch.DEFAULT_KEYS), help="properties compared across libraries")
+    p.add_argument('--report', help="write a combined CSV report")
+    p.add_argument('-j', '--jobs', type=int, help="worker processes (default: CPU count)")
+    p.set_defaults(func=cmd_batch)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except (OSError, ValueError, ET.ParseError) as e:
+        print(f"orcad-libmgr: error: {e}", file=sys.stderr)
+        return EXIT_ERROR
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""OrCAD library XML <-> PartTable helpers (no Tk dependency)."""
+import xml.etree.ElementTree as ET
+
+from part_table import PartTable
+
+
+def library_parts(root):
+    return [(pkg, pkg.find('LibPart')) for pkg in root.findall('.//Package') if pkg.find('LibPart') is not None]
+
+
+def user_props(libpart):
+    return {sup.get('name'): sup.get('val', '') for sup in libpart.findall('.//SymbolUserProp/Defn')}
+
+
+def part_record(pkg, libpart):
+    # (PartName, <Package><Defn> attributes, SymbolUserProps)
+    defn = pkg.find('Defn')
+    lp_defn = libpart.find('Defn')
+    pname = lp_defn.get('CellName') if lp_defn is not None else defn.get('name')
+    attr_map = dict(defn.attrib) if defn is not None else {}
+    return pname, attr_map, user_props(libpart)
+
+
+def iter_part_records(source):
+    """Yield part_record() for every <Package> while streaming `source` with iterparse.
+
+    Finished elements are detached from their parent as soon as they (and any
+    enclosing Package) have been consumed, so memory stays bounded by one Package.
+    """
+    stack = []
+    in_pkg = 0
+    for event, elem in ET.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            stack.append(elem)
+            if elem.tag == 'Package':
+                in_pkg += 1
+            continue
+        stack.pop()
+        if elem.tag == 'Package':
+            in_pkg -= 1
+            libpart = elem.find('LibPart')
+            if libpart is not None:
+                yield part_record(elem, libpart)
+        if not in_pkg and stack:
+            stack[-1].remove(elem)
+
+
+def add_records(table, records, defn_keys):
+    for pname, attr_map, user_map in records:
+        defn_keys.update(attr_map)
+        table.append(pname, {**attr_map, **user_map})
+
+
+def load_table(source):
+    # -> (PartTable with alphabetical columns, names of <Package><Defn> attributes)
+    table, defn_keys = PartTable(), set()
+    add_records(table, iter_part_records(source), defn_keys)
+    table.reorder(sorted(table.props))
+    return table, defn_keys
+
+
+def extract_template_parts(tree, with_defn=False):
+    # PartName -> SymbolUserProps; with_defn also merges in the <Package><Defn>
+    # attributes, giving the same properties load_table() puts in the table
+    parts = {}; root = tree.getroot()
+    for pkg in root.findall('.//Package'):
+        libpart = pkg.find('LibPart')
+        defn = libpart.find('Defn') if libpart is not None else None
+        pname = defn.get('CellName') if defn is not None else None
+        if not pname: continue
+        if with_defn:
+            pkg_defn = pkg.find('Defn')
+            parts[pname] = {**(pkg_defn.attrib if pkg_defn is not None else {}), **user_props(libpart)}
+        else:
+            parts[pname] = user_props(libpart)
+    return parts
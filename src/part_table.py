@@ -0,0 +1,331 @@
+import sys
+from array import array
+from collections import Counter
+
+PARTNAME = 'PartName'
+ROWS_BLOCK = 4096  # rows decoded per block by PartTable.rows()
+
+
+class Column:
+    """Dictionary-encoded property values: each distinct string is stored once and every
+    row holds an integer code. Indexing, slicing, iteration and len() behave like a list
+    of strings; `counts` keeps rows per code, so distinct values and group-bys are cheap.
+    Codes of values no row uses any more stay allocated (with a zero count).
+    """
+    __slots__ = ('values', 'ids', 'codes', 'counts')
+
+    def __init__(self, n=0):
+        self.values = ['']         # code -> value; code 0 is the empty string
+        self.ids = {'': 0}         # value -> code
+        self.codes = array('I', bytes(4 * n))
+        self.counts = [n]          # code -> rows holding it
+
+    @classmethod
+    def encoded(cls, values, codes):
+        # adopts `values` (distinct, values[0] == '') and the array of codes
+        col = cls()
+        col.values = values
+        col.ids = {v: i for i, v in enumerate(values)}
+        col.codes = codes
+        col.counts = [0] * len(values)
+        for c, n in Counter(codes).items():
+            col.counts[c] = n
+        return col
+
+    @classmethod
+    def from_values(cls, values):
+        col = cls()
+        for v in values:
+            col.append(v)
+        return col
+
+    def code(self, value):
+        c = self.ids.get(value)
+        if c is None:
+            c = self.ids[value] = len(self.values)
+            self.values.append(value)
+            self.counts.append(0)
+        return c
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return list(map(self.values.__getitem__, self.codes[i]))
+        return self.values[self.codes[i]]
+
+    def __iter__(self):
+        return map(self.values.__getitem__, self.codes)
+
+    def __setitem__(self, i, value):
+        c = self.code(value)
+        self.counts[self.codes[i]] -= 1
+        self.counts[c] += 1
+        self.codes[i] = c
+
+    def append(self, value):
+        c = self.ids.get(value)
+        if c is None:
+            c = self.code(value)
+        self.counts[c] += 1
+        self.codes.append(c)
+
+    def extend(self, values):
+        ids, codes, counts = self.ids, self.codes, self.counts
+        for v in values:
+            c = ids.get(v)
+            if c is None:
+                c = self.code(v)
+            counts[c] += 1
+            codes.append(c)
+
+    def extend_blank(self, n):
+        self.codes.extend(array('I', bytes(4 * n)))
+        self.counts[0] += n
+
+    def value_counts(self):
+        """{value: rows} for the values in use, empty string included."""
+        return {v: n for v, n in zip(self.values, self.counts) if n}
+
+    def distinct(self, start=0):
+        """Set of values used by rows[start:]."""
+        if start == 0:
+            return {v for v, n in zip(self.values, self.counts) if n}
+        return {self.values[c] for c in set(self.codes[start:])}
+
+    def map(self, fn, start=0):
+        """[fn(value) for rows[start:]], calling fn once per distinct value."""
+        if start == 0:
+            mapped = [fn(v) if n else None for v, n in zip(self.values, self.counts)]
+            return list(map(mapped.__getitem__, self.codes))
+        memo = {}
+        for c in set(self.codes[start:]):
+            memo[c] = fn(self.values[c])
+        return list(map(memo.__getitem__, self.codes[start:]))
+
+    def groups(self, start=0):
+        """{value: array of rows} for rows[start:], for group-by style queries."""
+        if start == 0:
+            # a stable sort by code lays each value's rows out in one run, `counts` long
+            order = array('I', sorted(range(len(self.codes)), key=self.codes.__getitem__))
+            groups, pos = {}, 0
+            for c, n in sorted((c, n) for c, n in enumerate(self.counts) if n):
+                groups[self.values[c]] = order[pos:pos + n]
+                pos += n
+            return groups
+        return {self.values[c]: rows for c, rows in _group(self.codes[start:], start).items()}
+
+    def rows_with(self, value):
+        c = self.ids.get(value)
+        if c is None or not self.counts[c]:
+            return array('I')
+        return array('I', (r for r, x in enumerate(self.codes) if x == c))
+
+
+def _group(keys, start):
+    groups = {}
+    for r, k in enumerate(keys, start):
+        hit = groups.get(k)
+        if hit is None:
+            hit = groups[k] = array('I')
+        hit.append(r)
+    return groups
+
+
+class PartTable:
+    """Columnar part store: one dictionary-encoded Column per property plus a PartName -> row index."""
+
+    def __init__(self, props=()):
+        self.props = []      # property names, column order (PartName excluded)
+        self.columns = []    # one Column per property
+        self.names = []      # PartName per row
+        self.index = {}      # PartName -> first row carrying that name
+        self._col = {}       # property name -> column number
+        self.dirty = {}      # row -> set of properties changed through set()
+        self.observers = []  # callables (row, prop, old, new) run after each set()
+        self.version = 0     # bumped on every append/set, for caches keyed on table state
+        for p in props:
+            self.add_prop(p)
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def from_rows(cls, header, rows):
+        table = cls()
+        table.extend_rows(header, rows)
+        return table
+
+    @classmethod
+    def from_columns(cls, names, props, columns):
+        # adopts the given Columns (other sequences are encoded); each must have one value per name
+        table = cls()
+        table.names = names
+        table.props[:] = [sys.intern(str(p)) for p in props]
+        table.columns[:] = [c if isinstance(c, Column) else Column.from_values(c) for c in columns]
+        table._col = {p: i for i, p in enumerate(table.props)}
+        for r, name in enumerate(names):
+            table.index.setdefault(name, r)
+        return table
+
+    def add_prop(self, name):
+        name = sys.intern(str(name))
+        if name not in self._col:
+            self._col[name] = len(self.props)
+            self.props.append(name)
+            self.columns.append(Column(len(self.names)))
+        return self._col[name]
+
+    def reorder(self, props):
+        # reorders columns; `props` must be a permutation of self.props
+        cols = [self.columns[self._col[p]] for p in props]
+        self.props[:] = props
+        self.columns[:] = cols
+        self._col = {p: i for i, p in enumerate(props)}
+
+    def extend_rows(self, header, rows):
+        """Append rows laid out as `header` ([PartName, prop, ...]); returns the first new row."""
+        start = len(self.names)
+        # duplicate header names collapse onto the same column
+        cols = [self.add_prop(p) for p in header[1:]]
+        width = len(cols)
+        if len(set(cols)) == width:
+            return self._extend_columns(cols, list(rows))
+        for row in rows:
+            values = [''] * len(self.props)
+            for ci, val in zip(cols, row[1:width + 1]):
+                values[ci] = val
+            self._append(row[0] if row else '', values)
+        return start
+
+    def _extend_columns(self, cols, rows):
+        # extend_rows() without duplicate header names: encoded column by column
+        start = len(self.names)
+        if not rows:
+            return start
+        self.version += 1
+        for r, row in enumerate(rows, start):
+            name = '' if not row or row[0] is None else str(row[0])
+            self.names.append(name)
+            self.index.setdefault(name, r)
+        for i, ci in enumerate(cols, 1):
+            self.columns[ci].extend([row[i] if len(row) > i else '' for row in rows])
+        for ci in set(range(len(self.columns))) - set(cols):
+            self.columns[ci].extend_blank(len(rows))
+        return start
+
+    def has_prop(self, name):
+        return name == PARTNAME or name in self._col
+
+    def append(self, name, values):
+        """Add a row. `values` maps property name -> value; unknown names add columns."""
+        for p in values:
+            if p not in self._col:
+                self.add_prop(p)
+        row = [''] * len(self.props)
+        for p, v in values.items():
+            row[self._col[p]] = '' if v is None else str(v)
+        return self._append(name, row)
+
+    def _append(self, name, row):
+        r = len(self.names)
+        self.version += 1
+        name = '' if name is None else str(name)
+        self.names.append(name)
+        for col, val in zip(self.columns, row):
+            col.append(val)
+        self.index.setdefault(name, r)
+        return r
+
+    def find(self, name):
+        return self.index.get(name)
+
+    def name(self, r):
+        return self.names[r]
+
+    def get(self, r, prop):
+        if prop == PARTNAME:
+            return self.names[r]
+        ci = self._col.get(prop)
+        return self.columns[ci][r] if ci is not None else ''
+
+    def set(self, r, prop, val):
+        val = '' if val is None else str(val)
+        old = self.get(r, prop)
+        if val == old:
+            return
+        self.version += 1
+        self.dirty.setdefault(r, set()).add(prop)
+        if prop == PARTNAME:
+            self.names[r] = val
+            if self.index.get(old) == r:
+                del self.index[old]
+                # another row may share the old name
+                for i, n in enumerate(self.names):
+                    if n == old:
+                        self.index[old] = i
+                        break
+            if val not in self.index or self.index[val] > r:
+                self.index[val] = r
+        else:
+            self.columns[self.add_prop(prop)][r] = val
+        for fn in self.observers:
+            fn(r, prop, old, val)
+
+    def column(self, prop):
+        if prop == PARTNAME:
+            return self.names
+        return self.columns[self._col[prop]]
+
+    def value_counts(self, prop):
+        """{value: rows} for one column; cheap for properties (kept per distinct value)."""
+        if prop == PARTNAME:
+            return dict(Counter(self.names))
+        return self.columns[self._col[prop]].value_counts()
+
+    def distinct(self, prop, start=0):
+        """Set of values `prop` takes in rows[start:]."""
+        if prop == PARTNAME:
+            return set(self.names[start:])
+        return self.columns[self._col[prop]].distinct(start)
+
+    def map_column(self, prop, fn, start=0):
+        """[fn(value) for rows[start:] of `prop`], evaluated once per distinct property value."""
+        if prop == PARTNAME:
+            return [fn(v) for v in self.names[start:]]
+        return self.columns[self._col[prop]].map(fn, start)
+
+    def groups(self, prop, start=0):
+        """{value: array of rows holding it} over rows[start:]."""
+        if prop == PARTNAME:
+            return _group(self.names[start:], start)
+        return self.columns[self._col[prop]].groups(start)
+
+    def rows_with(self, prop, value):
+        """Array of the rows whose `prop` equals `value` exactly."""
+        if prop == PARTNAME:
+            return array('I', (r for r, n in enumerate(self.names) if n == value))
+        if prop not in self._col:
+            return array('I')
+        return self.columns[self._col[prop]].rows_with(value)
+
+    def header(self):
+        return [PARTNAME] + self.props
+
+    def row(self, r):
+        return [self.names[r]] + [c.values[c.codes[r]] for c in self.columns]
+
+    def row_dict(self, r):
+        return {p: c.values[c.codes[r]] for p, c in zip(self.props, self.columns)}
+
+    def rows(self, order=None, columns=None):
+        """Row tuples in `order` (a sequence of rows, default all), decoded a block at a time.
+        `columns` (default all) is a list of this table's Columns, e.g. taken with the header."""
+        order = range(len(self.names)) if order is None else order
+        columns = self.columns if columns is None else columns
+        for start in range(0, len(order), ROWS_BLOCK):
+            block = order[start:start + ROWS_BLOCK]
+            cols = [list(map(self.names.__getitem__, block))]
+            cols += [list(map(c.values.__getitem__, map(c.codes.__getitem__, block))) for c in columns]
+            yield from zip(*cols)
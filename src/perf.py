@@ -0,0 +1,196 @@
+"""Timings and counters for the main operations (no Tk dependency).
+
+    with perf.timed('apply_search') as span:
+        ...
+        span.add(rows=len(hits))
+    perf.count('tk_calls', 3)
+
+Every operation name accumulates calls, total/max/last seconds and the counters
+added to its spans. Spans started on the Tk thread also record how much the global
+counters (e.g. tk_calls) grew while they were open. Operations that outlive one
+callback use begin()/Span.end() instead of the with-block.
+
+Capture mode ('profile', 'memory' or 'both'; also read from $ORCAD_LIBMGR_PROFILE)
+runs `timed` blocks under cProfile and/or tracemalloc and keeps the top entries of
+the latest run per operation. One block is captured at a time; blocks that start
+while another is being captured are only timed.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+
+CAPTURE_MODES = ('profile', 'memory', 'both')
+TOP = 25  # profile functions / allocation sites kept per capture
+
+_lock = threading.Lock()
+_ops = {}          # name -> Stats
+_counters = {}     # name -> int
+_capture = os.environ.get('ORCAD_LIBMGR_PROFILE') if os.environ.get('ORCAD_LIBMGR_PROFILE') in CAPTURE_MODES else None
+_capturing = False
+
+
+class Stats:
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+        self.counters = {}
+        self.capture = None   # {'profile': text, 'memory_peak_mb': ..., 'memory_top': [...]} of the last capture
+
+    def as_dict(self):
+        return {'calls': self.calls, 'total_s': round(self.total, 6), 'max_s': round(self.max, 6),
+                'last_s': round(self.last, 6), 'mean_s': round(self.total / self.calls, 6) if self.calls else 0.0,
+                'counters': dict(self.counters), 'capture': self.capture}
+
+
+class Span:
+    """One timed run of an operation; end() records it (only the first call counts)."""
+
+    def __init__(self, name, counters):
+        self.name = name
+        self.counters = dict(counters)
+        self.main = threading.current_thread() is threading.main_thread()
+        self._base = dict(_counters) if self.main else None
+        self._t0 = time.perf_counter()
+        self._done = False
+
+    def add(self, **counters):
+        for k, n in counters.items():
+            self.counters[k] = self.counters.get(k, 0) + n
+
+    def end(self, **counters):
+        if self._done:
+            return 0.0
+        self._done = True
+        elapsed = time.perf_counter() - self._t0
+        self.add(**counters)
+        with _lock:
+            if self._base is not None:
+                for k, n in _counters.items():
+                    grew = n - self._base.get(k, 0)
+                    if grew:
+                        self.counters[k] = self.counters.get(k, 0) + grew
+            st = _ops.get(self.name)
+            if st is None:
+                st = _ops[self.name] = Stats(self.name)
+            st.calls += 1
+            st.total += elapsed
+            st.last = elapsed
+            st.max = max(st.max, elapsed)
+            for k, n in self.counters.items():
+                st.counters[k] = st.counters.get(k, 0) + n
+        return elapsed
+
+
+def begin(name, **counters):
+    return Span(name, counters)
+
+
+def count(name, n=1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+class timed:
+    """Context manager around begin()/end(), with capture when it is enabled."""
+
+    def __init__(self, name, **counters):
+        self.name = name
+        self.counters = counters
+        self._profiler = None
+        self._tracing = False
+
+    def __enter__(self):
+        self._start_capture()
+        self.span = Span(self.name, self.counters)
+        return self.span
+
+    def __exit__(self, *exc):
+        self.span.end()
+        self._stop_capture()
+        return False
+
+    def _start_capture(self):
+        global _capturing
+        mode = _capture
+        if not mode:
+            return
+        with _lock:
+            if _capturing:
+                return
+            _capturing = True
+        if mode in ('profile', 'both'):
+            self._profiler = cProfile.Profile()
+            try:
+                self._profiler.enable()
+            except ValueError:
+                self._profiler = None  # another profiler is active
+        if mode in ('memory', 'both') and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        if not self._profiler and not self._tracing:
+            _capturing = False
+
+    def _stop_capture(self):
+        global _capturing
+        if not self._profiler and not self._tracing:
+            return
+        result = {}
+        if self._profiler:
+            self._profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(self._profiler, stream=out).sort_stats('cumulative').print_stats(TOP)
+            result['profile'] = out.getvalue()
+        if self._tracing:
+            peak = tracemalloc.get_traced_memory()[1]
+            top = tracemalloc.take_snapshot().statistics('lineno')[:TOP]
+            tracemalloc.stop()
+            result['memory_peak_mb'] = round(peak / 1e6, 3)
+            result['memory_top'] = [f"{s.size / 1e3:.1f} KB  {s.count} blocks  {s.traceback}" for s in top]
+        with _lock:
+            _capturing = False
+            st = _ops.get(self.name)
+            if st is not None:
+                st.capture = result
+
+
+def set_capture(mode):
+    global _capture
+    if mode not in CAPTURE_MODES + (None,):
+        raise ValueError(f"Unknown capture mode '{mode}' (use {', '.join(CAPTURE_MODES)})")
+    _capture = mode
+
+
+def capture_mode():
+    return _capture
+
+
+def reset():
+    with _lock:
+        _ops.clear()
+        _counters.clear()
+
+
+def stats():
+    """[Stats] ordered by total time, largest first."""
+    with _lock:
+        return sorted(_ops.values(), key=lambda s: s.total, reverse=True)
+
+
+def snapshot():
+    with _lock:
+        return {'capture': _capture, 'counters': dict(_counters),
+                'operations': {name: st.as_dict() for name, st in _ops.items()}}
+
+
+def write_json(path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot(), f, indent=1, ensure_ascii=False)
@@ -0,0 +1,147 @@
+"""Trigram index over PartTable values for substring search and Column:value filters."""
+import shlex
+from array import array
+
+GRAM = 3
+REFINE_SCAN_ROWS = 500  # below this, narrowing rescans rows instead of querying the index
+
+
+def parse_query(text, columns):
+    """Split a query into [(column or None, lowercased term)].
+
+    `Manufacturer:TI` scopes a term to one column (names match case-insensitively);
+    anything else, including `x:y` with an unknown column, searches all columns.
+    """
+    try:
+        tokens = shlex.split(text)
+    except ValueError:
+        tokens = text.split()
+    by_lower = {c.lower(): c for c in columns}
+    terms = []
+    for tok in tokens:
+        col, sep, val = tok.partition(':')
+        if sep and col.lower() in by_lower and val:
+            terms.append((by_lower[col.lower()], val.lower()))
+        elif tok:
+            terms.append((None, tok.lower()))
+    return terms
+
+
+def _refines(new, old):
+    # every old term is still constrained by some narrower-or-equal new term
+    return all(any(nc == oc and ot in nt for nc, nt in new) for oc, ot in old)
+
+
+class SearchIndex:
+    """Inverted index: distinct lowercased value -> rows, per column, plus trigrams -> values.
+
+    The index follows the table through PartTable observers, so edits keep it current.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self.values = []     # value id -> lowercased string
+        self._vid = {}
+        self.grams = {}      # trigram -> set of value ids
+        self.postings = {}   # column -> {value id: array of rows}
+        self.nrows = 0
+        self.last_terms = None
+        self.last_rows = None
+        table.observers.append(self._on_set)
+        self.sync()
+
+    def close(self):
+        if self._on_set in self.table.observers:
+            self.table.observers.remove(self._on_set)
+
+    def _value_id(self, text):
+        vid = self._vid.get(text)
+        if vid is None:
+            vid = self._vid[text] = len(self.values)
+            self.values.append(text)
+            for i in range(len(text) - GRAM + 1):
+                self.grams.setdefault(text[i:i + GRAM], set()).add(vid)
+        return vid
+
+    def sync(self):
+        # index rows appended since the last sync (e.g. while a library is streaming in)
+        table = self.table
+        start, stop = self.nrows, len(table)
+        if start == stop:
+            return
+        for col in table.header():
+            post = self.postings.setdefault(col, {})
+            for text, rows in table.groups(col, start).items():
+                if text:
+                    vid = self._value_id(text.lower())
+                    hits = post.get(vid)
+                    if hits is None:
+                        post[vid] = rows
+                    else:
+                        hits.extend(rows)
+        self.nrows = stop
+        self.last_terms = self.last_rows = None
+
+    def _on_set(self, r, prop, old, new):
+        if r >= self.nrows:
+            return
+        post = self.postings.setdefault(prop, {})
+        if old:
+            rows = post.get(self._vid.get(old.lower()))
+            if rows is not None and r in rows:
+                rows.remove(r)
+        if new:
+            vid = self._value_id(new.lower())
+            post.setdefault(vid, array('I')).append(r)
+        self.last_terms = self.last_rows = None
+
+    def _matching_values(self, term):
+        if len(term) < GRAM:
+            return [vid for vid, text in enumerate(self.values) if term in text]
+        grams = sorted((self.grams.get(term[i:i + GRAM], ()) for i in range(len(term) - GRAM + 1)), key=len)
+        candidates = set(grams[0]).intersection(*grams[1:])
+        return [vid for vid in candidates if term in self.values[vid]]
+
+    def _term_rows(self, col, term):
+        vids = self._matching_values(term)
+        rows = set()
+        for post in ([self.postings.get(col, {})] if col else self.postings.values()):
+            for vid in vids:
+                hits = post.get(vid)
+                if hits:
+                    rows.update(hits)
+        return rows
+
+    def _row_matches(self, r, terms):
+        table = self.table
+        for col, term in terms:
+            if col:
+                if term not in table.get(r, col).lower():
+                    return False
+            elif not any(term in v.lower() for v in table.row(r)):
+                return False
+        return True
+
+    def search(self, text):
+        """Set of rows matching every term of `text`, or None for an empty query."""
+        self.sync()
+        terms = parse_query(text, self.table.header())
+        if not terms:
+            self.last_terms = self.last_rows = None
+            return None
+        rows = None
+        if self.last_terms is not None and _refines(terms, self.last_terms):
+            # narrowing the previous query: results can only shrink
+            rows = self.last_rows
+            if len(rows) <= REFINE_SCAN_ROWS:
+                rows = {r for r in rows if self._row_matches(r, terms)}
+                self.last_terms, self.last_rows = terms, rows
+                return rows
+        if rows is None or rows:
+            for col, term in sorted(terms, key=lambda t: -len(t[1])):
+                hits = self._term_rows(col, term)
+                rows = hits if rows is None else rows & hits
+                if not rows:
+                    break
+        self.last_terms, self.last_rows = terms, rows
+        return rows
@@ -0,0 +1,78 @@
+"""Typed, cached sort keys for PartTable columns."""
+import re
+
+# SI prefixes as used in part values; 'R' stands in for the decimal point (4R7 = 4.7)
+SCALE = {'': 1.0, 'p': 1e-12, 'n': 1e-9, 'u': 1e-6, 'µ': 1e-6, 'm': 1e-3, 'R': 1.0, 'r': 1.0,
+         'k': 1e3, 'K': 1e3, 'M': 1e6, 'G': 1e9}
+
+_NUMBER = re.compile(r'^([+-]?(?:\d+(?:[.,]\d*)?|[.,]\d+))\s*([pnuµmkKMGRr]?)([A-Za-zΩ%]*)$')
+_INFIX = re.compile(r'^(\d+)([pnuµmkKMGRr])(\d+)([A-Za-zΩ%]*)$')   # 4k7, 2n2F, 4R7
+_CHUNKS = re.compile(r'(\d+)')
+
+NUMERIC, TEXT, EMPTY = 0, 1, 2
+
+
+def sort_key(value):
+    """Numbers (with SI prefix and unit: 10k, 4.7uF, 4k7, 0402) sort by magnitude before
+    text, text sorts naturally (R2 < R10) and case-insensitively, and empty values sort last."""
+    text = value.strip()
+    if not text:
+        return (EMPTY,)
+    m = _NUMBER.match(text)
+    if m:
+        num, prefix, unit = m.groups()
+        return (NUMERIC, float(num.replace(',', '.')) * SCALE[prefix], unit.lower(), text)
+    m = _INFIX.match(text)
+    if m:
+        whole, prefix, frac, unit = m.groups()
+        return (NUMERIC, float(f'{whole}.{frac}') * SCALE[prefix], unit.lower(), text)
+    low = text.lower()
+    parts = tuple((0, int(c), '') if c.isdigit() else (1, 0, c) for c in _CHUNKS.split(low) if c)
+    return (TEXT, parts, text)
+
+
+class SortKeyCache:
+    """Per-column sort keys and sorted row orders, kept in step with the table.
+
+    Keys are computed once per column and patched on edits (via PartTable observers);
+    a repeated sort on an unchanged table returns the cached order.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self._keys = {}    # column -> list of sort keys
+        self._orders = {}  # specs -> (table version, row order)
+        table.observers.append(self._on_set)
+
+    def close(self):
+        if self._on_set in self.table.observers:
+            self.table.observers.remove(self._on_set)
+
+    def keys(self, col):
+        keys = self._keys.setdefault(col, [])
+        if len(keys) < len(self.table):
+            # one key per distinct value, shared by the rows holding it
+            keys.extend(self.table.map_column(col, sort_key, len(keys)))
+        return keys
+
+    def _on_set(self, r, prop, old, new):
+        keys = self._keys.get(prop)
+        if keys is not None and r < len(keys):
+            keys[r] = sort_key(new)
+
+    def order(self, specs):
+        """All rows sorted by `specs` = [(column, descending)], most significant first (stable)."""
+        specs = tuple(specs)
+        cached = self._orders.get(specs)
+        if cached and cached[0] == self.table.version:
+            return list(cached[1])
+        rows = list(range(len(self.table)))
+        for col, descending in reversed(specs):
+            if self.table.has_prop(col):
+                keys = self.keys(col)
+                rows.sort(key=keys.__getitem__, reverse=descending)
+                if descending:
+                    # reversing moved the blanks to the front; they go last either way (stable)
+                    rows = [r for r in rows if keys[r][0] != EMPTY] + [r for r in rows if keys[r][0] == EMPTY]
+        self._orders[specs] = (self.table.version, rows)
+        return list(rows)
@@ -0,0 +1,20 @@
+"""Part-name validation against a template (no Tk dependency)."""
+
+
+def validate_names(names, template_parts):
+    # -> (names found in the template, names that would be added); case-insensitive
+    tmpl_keys = {name.lower() for name in template_parts}
+    updated = [p for p in names if p.lower() in tmpl_keys]
+    added = [p for p in names if p.lower() not in tmpl_keys]
+    return updated, added
+
+
+def validation_message(updated, added):
+    return (
+        f"CSV Validation Results:\n\n"
+        f"  To Update (in template): {len(updated)}\n"
+        f"    Examples: {updated[:5]}\n\n"
+        f"  To Add (new parts): {len(added)}\n"
+        f"    Examples: {added[:5]}"
+    )
+
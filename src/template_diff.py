@@ -0,0 +1,141 @@
+"""Structured diff of a PartTable against template parts (no Tk dependency).
+
+Part names and property names match case-insensitively and values are compared
+after stripping; an empty value counts as an absent property. Parts are matched
+through a dict keyed by normalized name, and a part whose normalized property map
+equals the template's is skipped without a per-property comparison.
+"""
+import csv
+import json
+
+PART_ADDED = 'part added'        # in the table, not in the template
+PART_REMOVED = 'part removed'    # in the template, not in the table
+PROP_ADDED = 'property added'
+PROP_REMOVED = 'property removed'
+VALUE_CHANGED = 'value changed'
+KINDS = (PART_ADDED, PART_REMOVED, PROP_ADDED, PROP_REMOVED, VALUE_CHANGED)
+
+FIELDS = ('Change', 'PartName', 'Property', 'Template', 'Table')
+
+
+def _key(text):
+    return text.strip().lower()
+
+
+def table_maps(table):
+    """{part key: (PartName, row, {property key: value})} in row order. A duplicated name
+    maps to its last row, the one Save XML writes (xml_save.update_map)."""
+    last = {}
+    for r, name in enumerate(table.names):
+        k = _key(name)
+        if k:
+            last.pop(k, None)
+            last[k] = r
+    rows = {r: {} for r in last.values()}
+    # column by column: each property name is normalized once, not once per cell
+    for prop, col in zip(table.props, table.columns):
+        pk = _key(prop)
+        if not pk:
+            continue
+        for r, m in rows.items():
+            v = col[r].strip()
+            if v:
+                m[pk] = v
+    return {k: (table.names[r].strip(), r, rows[r]) for k, r in last.items()}
+
+
+def template_maps(template_parts):
+    maps = {}
+    for pname, props in template_parts.items():
+        k = _key(pname)
+        if k in maps:
+            continue
+        m = {}
+        for p, v in props.items():
+            pk, v = _key(p or ''), (v or '').strip()
+            if pk and v:
+                m[pk] = v
+        maps[k] = (pname.strip(), m)
+    return maps
+
+
+def _display_names(table, template_parts):
+    # property key -> name as spelled in the table (else the template)
+    names = {}
+    for props in template_parts.values():
+        for p in props:
+            if p:
+                names.setdefault(_key(p), p.strip())
+    for p in table.props:
+        names[_key(p)] = p.strip()
+    return names
+
+
+class TemplateDiff:
+    """`changes` holds (kind, PartName, property, template value, table value) tuples,
+    table parts first in table order, then parts only in the template; `rows` maps
+    each change to its table row (None for removed parts)."""
+
+    def __init__(self, table, template_parts):
+        tmaps = template_maps(template_parts)
+        names = _display_names(table, template_parts)
+        self.changes = []
+        self.rows = []
+        self.unchanged = 0
+        for k, (pname, r, m) in table_maps(table).items():
+            tm = tmaps.get(k)
+            if tm is None:
+                self._add((PART_ADDED, pname, '', '', ''), r)
+                continue
+            if m == tm[1]:
+                self.unchanged += 1
+                continue
+            self._compare(pname, r, tm[1], m, names)
+        table_keys = {_key(n) for n in table.names}
+        for k, (pname, _) in tmaps.items():
+            if k not in table_keys:
+                self._add((PART_REMOVED, pname, '', '', ''), None)
+
+    def _add(self, change, row):
+        self.changes.append(change)
+        self.rows.append(row)
+
+    def _compare(self, pname, r, old, new, names):
+        for pk in sorted(old.keys() | new.keys()):
+            a, b = old.get(pk), new.get(pk)
+            if a == b:
+                continue
+            kind = PROP_ADDED if a is None else PROP_REMOVED if b is None else VALUE_CHANGED
+            self._add((kind, pname, names.get(pk, pk), a or '', b or ''), r)
+
+    def __len__(self):
+        return len(self.changes)
+
+    def counts(self):
+        counts = dict.fromkeys(KINDS, 0)
+        for change in self.changes:
+            counts[change[0]] += 1
+        counts['parts changed'] = len({c[1] for c in self.changes if c[0] not in (PART_ADDED, PART_REMOVED)})
+        counts['parts unchanged'] = self.unchanged
+        return counts
+
+    def summary(self):
+        return ', '.join(f"{k}: {n}" for k, n in self.counts().items() if n)
+
+    def write_csv(self, path):
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(FIELDS)
+            writer.writerows(self.changes)
+        return len(self.changes)
+
+    def write_json(self, path):
+        keys = [f.lower() for f in FIELDS]
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'summary': self.counts(),
+                       'changes': [dict(zip(keys, c)) for c in self.changes]}, f, indent=1, ensure_ascii=False)
+        return len(self.changes)
+
+    def write(self, path):
+        # format by extension: .json, anything else CSV
+        return self.write_json(path) if path.lower().endswith('.json') else self.write_csv(path)
@@ -0,0 +1,247 @@
+"""Bulk value transforms and rule packs for PartTable columns (no Tk dependency).
+
+Rules are compiled once and run column by column over the selected rows. Value
+rules map each distinct string once per column, so repeated values cost a dict
+lookup. preview() returns the resulting cell changes without touching the table;
+apply() writes them as a single journal step.
+
+A rule pack is a JSON list of rule specs, e.g.
+    [{"rule": "units", "columns": ["Value"]},
+     {"rule": "replace", "pattern": "\\\\s+", "replace": " ", "regex": true},
+     {"rule": "case", "mode": "upper", "columns": ["Manufacturer"]},
+     {"rule": "rename", "from": "Mfr", "to": "Manufacturer"}]
+"""
+import json
+import re
+
+from part_table import PARTNAME
+
+
+class Rule:
+    """Base for rules that map a single value; `columns` None means every property but PartName."""
+    name = ''
+
+    def __init__(self, columns=None):
+        self.columns = list(columns) if columns else None
+
+    def targets(self, props):
+        if self.columns is None:
+            return list(props)
+        return [c for c in self.columns if c == PARTNAME or c in props]
+
+    def __call__(self, value):
+        raise NotImplementedError
+
+    def where(self):
+        return ', '.join(self.columns) if self.columns else 'all properties'
+
+    def describe(self):
+        return f"{self.name} ({self.where()})"
+
+
+class Replace(Rule):
+    name = 'replace'
+
+    def __init__(self, pattern, replace, columns=None, regex=False, ignore_case=False):
+        super().__init__(columns)
+        self.pattern = pattern
+        self.replace = replace
+        if not pattern:
+            # an empty pattern matches between every character and in empty cells
+            raise ValueError("Replace needs something to find")
+        try:
+            self.regex = re.compile(pattern if regex else re.escape(pattern), re.IGNORECASE if ignore_case else 0)
+        except re.error as e:
+            raise ValueError(f"Bad pattern {pattern!r}: {e}")
+        # a literal replacement must not be read as a template (\1, \g<0>)
+        self.repl = replace if regex else replace.replace('\\', '\\\\')
+
+    def __call__(self, value):
+        return self.regex.sub(self.repl, value)
+
+    def describe(self):
+        return f"replace {self.pattern!r} -> {self.replace!r} ({self.where()})"
+
+
+class Case(Rule):
+    name = 'case'
+    MODES = {'upper': str.upper, 'lower': str.lower, 'title': str.title, 'strip': str.strip}
+
+    def __init__(self, mode, columns=None):
+        super().__init__(columns)
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown case mode '{mode}' (use {', '.join(self.MODES)})")
+        self.mode = mode
+        self.fn = self.MODES[mode]
+
+    def __call__(self, value):
+        return self.fn(value)
+
+    def describe(self):
+        return f"{self.mode} ({self.where()})"
+
+
+_UNITS = {'f': 'F', 'h': 'H', 'v': 'V', 'a': 'A', 'w': 'W', 'hz': 'Hz', 'ω': 'Ω', 'ohm': 'ohm'}
+_UNIT = '((?i:' + '|'.join(sorted(_UNITS, key=len, reverse=True)) + '))'
+_PREFIXES = {'µ': 'u', 'μ': 'u', 'K': 'k'}
+_DECIMAL = re.compile(r'^(\d+)(?:([.,])(\d*))?\s*([pnuµμmkKMG]?)\s*' + _UNIT + r'?$')
+_INFIX = re.compile(r'^(\d+)([pnuµμmkKMG])(\d+)\s*' + _UNIT + r'?$')
+
+
+class Units(Rule):
+    """4,7uF -> 4.7uF, 100 nF -> 100nF, 4K7 -> 4.7k, 10.0 k -> 10k, 2.2µH -> 2.2uH.
+    Bare numbers (0402, 10), thousands separators (4,700uF) and anything not shaped
+    like a value are left alone."""
+    name = 'units'
+
+    def __call__(self, value):
+        text = value.strip()
+        m = _INFIX.match(text)
+        if m:
+            whole, prefix, frac, unit = m.groups()
+        else:
+            m = _DECIMAL.match(text)
+            if not m:
+                return value
+            whole, sep, frac, prefix, unit = m.groups()
+            if not prefix and not unit or sep == ',' and len(frac) == 3:
+                return value
+        frac = (frac or '').rstrip('0')
+        number = whole + ('.' + frac if frac else '')
+        return number + _PREFIXES.get(prefix, prefix) + (_UNITS[unit.lower()] if unit else '')
+
+
+class Rename:
+    """Move a property's values to another name. If the target exists, target values
+    win and `source` only fills its empty cells (a merge); the source column is emptied."""
+    name = 'rename'
+
+    def __init__(self, source, target):
+        if not source or not target or source == target:
+            raise ValueError("Rename needs two different property names")
+        if PARTNAME in (source, target):
+            raise ValueError("PartName cannot be renamed")
+        self.source = source
+        self.target = target
+
+    def describe(self):
+        return f"rename {self.source} -> {self.target}"
+
+
+RULES = {'replace': Replace, 'case': Case, 'units': Units, 'rename': Rename}
+
+
+def rule_from_spec(spec):
+    spec = dict(spec)
+    kind = spec.pop('rule', None)
+    if kind not in RULES:
+        raise ValueError(f"Unknown rule '{kind}'")
+    if kind == 'rename':
+        return Rename(spec.get('from'), spec.get('to'))
+    try:
+        return RULES[kind](**spec)
+    except TypeError as e:
+        raise ValueError(f"Bad '{kind}' rule: {e}")
+
+
+def load_pack(path):
+    with open(path, encoding='utf-8') as f:
+        specs = json.load(f)
+    if not isinstance(specs, list):
+        raise ValueError("A rule pack is a JSON list of rules")
+    return [rule_from_spec(s) for s in specs]
+
+
+PRESETS = {
+    'BOM basics': [
+        {'rule': 'case', 'mode': 'strip'},
+        {'rule': 'replace', 'pattern': r'\s{2,}', 'replace': ' ', 'regex': True},
+        {'rule': 'units', 'columns': ['Value']},
+    ],
+    'Canonical values': [{'rule': 'units', 'columns': ['Value']}],
+    'Manufacturer from Mfr': [{'rule': 'rename', 'from': 'Mfr', 'to': 'Manufacturer'}],
+}
+
+
+class Preview:
+    """Result of running rules over a table: `changes` as (row, property, old, new) and
+    `counts` = cells changed per rule (a cell can be counted by several rules)."""
+
+    def __init__(self, changes, counts):
+        self.changes = changes
+        self.counts = counts
+
+    def __len__(self):
+        return len(self.changes)
+
+    def rows(self):
+        return len({r for r, _, _, _ in self.changes})
+
+    def summary(self):
+        lines = [f"{n:>7}  {rule.describe()}" for rule, n in self.counts]
+        lines.append(f"{len(self.changes)} cells in {self.rows()} parts would change")
+        return '\n'.join(lines)
+
+
+def preview(table, rules, rows=None):
+    """Run `rules` in order over `rows` (default all) without modifying `table`."""
+    every = rows is None
+    rows = list(range(len(table))) if every else list(rows)
+    work = {}     # property -> working values for `rows`, created on first change
+
+    def values(prop):
+        col = work.get(prop)
+        if col is None:
+            if table.has_prop(prop):
+                source = table.column(prop)
+                col = list(source) if every else [source[r] for r in rows]
+            else:
+                col = [''] * len(rows)
+        return col
+
+    counts = []
+    for rule in rules:
+        changed = 0
+        if isinstance(rule, Rename):
+            src = values(rule.source)
+            changed = sum(1 for v in src if v)
+            if changed:
+                work[rule.target] = [d or v for v, d in zip(src, values(rule.target))]
+                work[rule.source] = [''] * len(rows)
+        else:
+            props = table.props + [p for p in work if not table.has_prop(p)]
+            for prop in rule.targets(props):
+                col = values(prop)
+                memo = {}
+                out = []
+                for v in col:
+                    n = memo.get(v)
+                    if n is None:
+                        n = memo[v] = rule(v)
+                    out.append(n)
+                diff = sum(1 for a, b in zip(col, out) if a != b)
+                if diff:
+                    work[prop] = out
+                    changed += diff
+        counts.append((rule, changed))
+
+    changes = []
+    for prop, col in work.items():
+        if table.has_prop(prop):
+            source = table.column(prop)
+            changes.extend((r, prop, source[r], v) for r, v in zip(rows, col) if source[r] != v)
+        else:
+            changes.extend((r, prop, '', v) for r, v in zip(rows, col) if v)
+    return Preview(changes, counts)
+
+
+def apply(table, result, journal=None):
+    """Write a preview's changes to `table`, as one undo step when a journal is given."""
+    if journal is None:
+        for r, prop, _, new in result.changes:
+            table.set(r, prop, new)
+        return len(result)
+    with journal.group():
+        for r, prop, _, new in result.changes:
+            table.set(r, prop, new)
+    return len(result)
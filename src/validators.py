@@ -0,0 +1,296 @@
+"""Rule-based validation of PartTable rows (no Tk dependency).
+
+A rule set is a JSON list of checks:
+    {"check": "required", "columns": ["Value", "Manufacturer"]}
+    {"check": "enum", "column": "Tolerance", "values": ["1%", "5%"], "ignore_case": true}
+    {"check": "pattern", "column": "Value", "regex": "\\\\d+(\\\\.\\\\d+)?[pnumkM]?[FHΩ]?"}
+    {"check": "cross", "if": {"column": "Type", "regex": "CAP.*"},
+                       "then": {"column": "Voltage", "regex": "\\\\d+V"}}
+    {"check": "unique", "column": "PartName"}
+Each may carry a "name"; regexes must match the whole value and empty values pass
+pattern/enum checks (use "required" for those). Checks run column by column and
+evaluate each distinct value once; large row sets are split across worker processes.
+"""
+import csv
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from part_table import PARTNAME
+
+PARALLEL_ROWS = 100000   # row count from which validate() fans out to worker processes
+CHUNK_ROWS = 50000
+
+DEFAULT_RULES = [
+    {'check': 'required', 'columns': [PARTNAME], 'name': 'PartName required'},
+    {'check': 'unique', 'column': PARTNAME, 'name': 'duplicate PartName'},
+]
+
+
+class _Blank:
+    # stands in for a column the table does not have
+    def __getitem__(self, i):
+        return ''
+
+
+def _compile(regex, ignore_case=False):
+    try:
+        return re.compile(regex, re.IGNORECASE if ignore_case else 0)
+    except re.error as e:
+        raise ValueError(f"Bad regex {regex!r}: {e}")
+
+
+class Check:
+    """Compiled check. run(column, positions) yields (position, column, message) for failures,
+    where column(name) returns a value list indexable by position."""
+    kind = ''
+    parallel = True  # False when a check needs every row at once
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.name = spec.get('name') or self.default_name()
+
+    def default_name(self):
+        return self.kind
+
+    def columns(self):
+        return []
+
+
+class Required(Check):
+    kind = 'required'
+
+    def __init__(self, spec):
+        self.cols = list(spec.get('columns') or [spec['column']])
+        super().__init__(spec)
+
+    def default_name(self):
+        return f"{', '.join(self.cols)} required"
+
+    def columns(self):
+        return self.cols
+
+    def run(self, column, positions):
+        for c in self.cols:
+            values = column(c)
+            for i in positions:
+                if not values[i].strip():
+                    yield i, c, "missing value"
+
+
+class _ValueCheck(Check):
+    # a check on one column decided by the value alone, so it is evaluated per distinct value
+
+    def __init__(self, spec):
+        self.col = spec['column']
+        super().__init__(spec)
+
+    def columns(self):
+        return [self.col]
+
+    def bad(self, value):
+        raise NotImplementedError
+
+    def run(self, column, positions):
+        values = column(self.col)
+        memo = {}
+        for i in positions:
+            v = values[i]
+            msg = memo.get(v)
+            if msg is None:
+                msg = memo[v] = self.bad(v) if v.strip() else ''
+            if msg:
+                yield i, self.col, msg
+
+
+class Enum(_ValueCheck):
+    kind = 'enum'
+
+    def __init__(self, spec):
+        self.ignore_case = spec.get('ignore_case', False)
+        norm = str.lower if self.ignore_case else str
+        self.allowed = {norm(v) for v in spec['values']}
+        self.norm = norm
+        super().__init__(spec)
+
+    def default_name(self):
+        return f"{self.col} in list"
+
+    def bad(self, value):
+        return '' if self.norm(value.strip()) in self.allowed else f"{value!r} is not an allowed value"
+
+
+class Pattern(_ValueCheck):
+    kind = 'pattern'
+
+    def __init__(self, spec):
+        self.regex = _compile(spec['regex'], spec.get('ignore_case', False))
+        super().__init__(spec)
+
+    def default_name(self):
+        return f"{self.col} format"
+
+    def bad(self, value):
+        return '' if self.regex.fullmatch(value.strip()) else f"{value!r} does not match {self.regex.pattern}"
+
+
+class Cross(Check):
+    """When the "if" column matches, the "then" column must match (or just be non-empty)."""
+    kind = 'cross'
+
+    def __init__(self, spec):
+        cond, then = spec['if'], spec['then']
+        self.if_col, self.then_col = cond['column'], then['column']
+        self.if_re = _compile(cond.get('regex', '.+'), cond.get('ignore_case', False))
+        self.then_re = _compile(then.get('regex', '.+'), then.get('ignore_case', False))
+        super().__init__(spec)
+
+    def default_name(self):
+        return f"{self.then_col} when {self.if_col}"
+
+    def columns(self):
+        return [self.if_col, self.then_col]
+
+    def run(self, column, positions):
+        conds, values = column(self.if_col), column(self.then_col)
+        if_memo, then_memo = {}, {}
+        for i in positions:
+            c = conds[i]
+            hit = if_memo.get(c)
+            if hit is None:
+                hit = if_memo[c] = bool(self.if_re.fullmatch(c.strip()))
+            if not hit:
+                continue
+            v = values[i]
+            ok = then_memo.get(v)
+            if ok is None:
+                ok = then_memo[v] = bool(self.then_re.fullmatch(v.strip()))
+            if not ok:
+                yield i, self.then_col, f"{self.if_col}={c!r} requires {self.then_col} to match {self.then_re.pattern}"
+
+
+class Unique(Check):
+    """Values (stripped, case-insensitive) that occur on more than one row; every such row fails."""
+    kind = 'unique'
+    parallel = False
+
+    def __init__(self, spec):
+        self.col = spec.get('column', PARTNAME)
+        super().__init__(spec)
+
+    def default_name(self):
+        return f"duplicate {self.col}"
+
+    def columns(self):
+        return [self.col]
+
+    def run(self, column, positions):
+        values = column(self.col)
+        seen = {}
+        for i in positions:
+            k = values[i].strip().lower()
+            if k:
+                seen.setdefault(k, []).append(i)
+        for k, hits in seen.items():
+            if len(hits) > 1:
+                for i in hits:
+                    yield i, self.col, f"{values[i].strip()!r} appears on {len(hits)} rows"
+
+
+CHECKS = {'required': Required, 'enum': Enum, 'pattern': Pattern, 'cross': Cross, 'unique': Unique}
+
+
+def compile_rules(specs):
+    checks = []
+    for spec in specs:
+        kind = spec.get('check')
+        if kind not in CHECKS:
+            raise ValueError(f"Unknown check '{kind}'")
+        try:
+            checks.append(CHECKS[kind](spec))
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Bad '{kind}' check {spec!r}: missing {e}")
+    return checks
+
+
+def load_rules(path):
+    with open(path, encoding='utf-8') as f:
+        specs = json.load(f)
+    if not isinstance(specs, list):
+        raise ValueError("A rule set is a JSON list of checks")
+    return specs
+
+
+class ValidationReport:
+    """`errors` = [(row, column, rule name, message)] ordered by row."""
+
+    def __init__(self, errors, rows_checked):
+        self.errors = errors
+        self.rows_checked = rows_checked
+
+    def __len__(self):
+        return len(self.errors)
+
+    def counts(self):
+        counts = {}
+        for _, _, rule, _ in self.errors:
+            counts[rule] = counts.get(rule, 0) + 1
+        return counts
+
+    def summary(self):
+        if not self.errors:
+            return f"{self.rows_checked} rows checked, no problems"
+        rows = len({e[0] for e in self.errors})
+        per_rule = ', '.join(f"{rule}: {n}" for rule, n in self.counts().items())
+        return f"{len(self.errors)} problems in {rows} of {self.rows_checked} rows ({per_rule})"
+
+    def write_csv(self, path, table):
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Row', 'PartName', 'Property', 'Rule', 'Problem'])
+            for r, col, rule, msg in self.errors:
+                writer.writerow([r + 1, table.name(r), col, rule, msg])
+        return len(self.errors)
+
+
+def _run(checks, column, positions):
+    errors = []
+    for check in checks:
+        errors.extend((i, col, check.name, msg) for i, col, msg in check.run(column, positions))
+    return errors
+
+
+def _run_chunk(specs, columns, rows):
+    # worker: `columns` holds only the needed columns, cut down to `rows`
+    errors = _run(compile_rules(specs), lambda c: columns.get(c) or _Blank(), range(len(rows)))
+    return [(rows[i], col, name, msg) for i, col, name, msg in errors]
+
+
+def validate(table, specs, rows=None, workers=None):
+    """Run the rule specs over `rows` (default all); returns a ValidationReport."""
+    checks = compile_rules(specs)
+    rows = list(range(len(table))) if rows is None else list(rows)
+
+    def column(c):
+        return table.column(c) if table.has_prop(c) else _Blank()
+
+    serial = [c for c in checks if not c.parallel]
+    parallel = [c for c in checks if c.parallel]
+    if parallel and len(rows) >= PARALLEL_ROWS and workers != 1 and (os.cpu_count() or 1) > 1:
+        needed = {c for check in parallel for c in check.columns() if table.has_prop(c)}
+        pspecs = [check.spec for check in parallel]
+        errors = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = []
+            for start in range(0, len(rows), CHUNK_ROWS):
+                chunk = rows[start:start + CHUNK_ROWS]
+                cols = {c: [table.column(c)[r] for r in chunk] for c in needed}
+                futures.append(pool.submit(_run_chunk, pspecs, cols, chunk))
+            for fut in futures:
+                errors.extend(fut.result())
+    else:
+        errors = _run(parallel, column, rows)
+    errors.extend(_run(serial, column, rows))
+    errors.sort(key=lambda e: e[0])
+    return ValidationReport(errors, len(rows))
@@ -0,0 +1,110 @@
+import perf
+
+
+class VirtualGrid:
+    """Keeps a fixed window of Treeview items and rebinds their values as the view scrolls.
+
+    Item iids are slot numbers ('0', '1', ...); `rows` holds the model rows in view order
+    and `top` is the index of the row shown in slot 0.
+    """
+
+    def __init__(self, table, fetch, yscroll=None, rowheight=24):
+        self.table = table
+        self.fetch = fetch          # model row -> list of cell values
+        self.yscroll = yscroll      # scrollbar .set, driven by us instead of the Treeview
+        self.rowheight = rowheight
+        self.rows = []
+        self.top = 0
+        self.slots = 0              # Treeview items currently created
+        self.height = 1             # rows that fit in the viewport
+        self.selected = set()       # model rows, survives scrolling
+        table.bind('<<TreeviewSelect>>', self._on_select, add='+')
+        table.bind('<Configure>', self._on_configure, add='+')
+        table.bind('<Down>', lambda e: self._on_key(1))
+        table.bind('<Up>', lambda e: self._on_key(-1))
+        table.bind('<Next>', lambda e: self.scroll(self.height) or 'break')
+        table.bind('<Prior>', lambda e: self.scroll(-self.height) or 'break')
+
+    def set_rows(self, rows):
+        self.rows = rows
+        self.top = 0
+        self.selected.clear()
+        self.render()
+
+    def row_of(self, iid):
+        i = self.top + int(iid)
+        return self.rows[i] if i < len(self.rows) else None
+
+    def render(self):
+        n = min(self.height, len(self.rows))
+        self.top = max(0, min(self.top, len(self.rows) - n))
+        perf.count('tk_calls', n + abs(n - self.slots) + 1)
+        while self.slots < n:
+            self.table.insert('', 'end', iid=str(self.slots))
+            self.slots += 1
+        while self.slots > n:
+            self.slots -= 1
+            self.table.delete(str(self.slots))
+        sel = []
+        for i in range(n):
+            r = self.rows[self.top + i]
+            self.table.item(str(i), values=self.fetch(r))
+            if r in self.selected:
+                sel.append(str(i))
+        self.table.selection_set(sel)
+        if self.yscroll:
+            total = len(self.rows) or 1
+            self.yscroll(self.top / total, (self.top + n) / total)
+
+    def scroll(self, lines):
+        top = max(0, min(self.top + lines, len(self.rows) - self.height))
+        if top != self.top:
+            self.top = top
+            self.render()
+
+    def reveal(self, row):
+        """Scroll `row` into view and select it; returns its slot iid, None if it is not in the view."""
+        try:
+            i = self.rows.index(row)
+        except ValueError:
+            return None
+        if not self.top <= i < self.top + self.height:
+            self.top = max(0, i - self.height // 2)
+        self.selected.clear()
+        self.selected.add(row)
+        self.render()
+        iid = str(i - self.top)
+        self.table.focus(iid)
+        return iid
+
+    def yview(self, *args):
+        # same protocol as Treeview.yview, so a Scrollbar can drive us directly
+        if args[0] == 'moveto':
+            self.scroll(int(float(args[1]) * len(self.rows)) - self.top)
+        elif args[0] == 'scroll':
+            lines = int(args[1])
+            self.scroll(lines * self.height if args[2] == 'pages' else lines)
+
+    def _on_configure(self, event):
+        # one row's worth of pixels goes to the heading
+        height = max(1, event.height // self.rowheight - 1)
+        if height != self.height:
+            self.height = height
+            self.render()
+
+    def _on_select(self, event=None):
+        visible = self.rows[self.top:self.top + self.slots]
+        self.selected.difference_update(visible)
+        self.selected.update(self.row_of(iid) for iid in self.table.selection())
+
+    def _on_key(self, step):
+        focus = self.table.focus()
+        if not focus:
+            return None
+        slot = int(focus) + step
+        if 0 <= slot < self.slots:
+            return None  # plain Treeview navigation inside the window
+        self.scroll(step)
+        self.table.focus(focus)
+        self.table.selection_set(focus)
+        return 'break'
@@ -0,0 +1,454 @@
+"""Write PartTable values back into an OrCAD template tree (no Tk dependency)."""
+import os
+import shutil
+from bisect import bisect_right
+from itertools import accumulate
+import xml.etree.ElementTree as ET
+from contextlib import contextmanager
+from xml.parsers import expat
+
+from orcad_xml import extract_template_parts, user_props
+
+
+def norm_name(name):
+    return str(name).strip().lower()
+
+
+class TemplateIndex:
+    """Template packages keyed by normalized CellName, built once per template.
+
+    `source` is the file the tree was parsed from; while it is unchanged on disk,
+    write_tree() copies every untouched Package from it byte for byte.
+    """
+
+    def __init__(self, tree, source=None):
+        self.tree = tree
+        self.packages = {}  # norm CellName -> [(pname, pkg_defn, libpart, lib_defn, pkg)] in document order
+        self.order = []     # (key, pname) per indexed package, document order
+        self.all_packages = list(tree.getroot().iter('Package'))
+        self.touched = set()  # Package elements mutated since the template was parsed
+        self.source = source
+        self.source_stat = _stat_key(source) if source else None
+        self._spans = None
+        self._template_parts = {}
+        for pkg in self.all_packages:
+            libpart = pkg.find('LibPart')
+            if libpart is None:
+                continue
+            pkg_defn = pkg.find('Defn')
+            lib_defn = libpart.find('Defn')
+            if pkg_defn is None or lib_defn is None:
+                continue
+            pname = lib_defn.get('CellName')
+            if not pname:
+                continue
+            key = norm_name(pname)
+            self.packages.setdefault(key, []).append((pname, pkg_defn, libpart, lib_defn, pkg))
+            self.order.append((key, pname))
+
+    def __contains__(self, key):
+        return key in self.packages
+
+    def template_parts(self, with_defn=False):
+        # memo of extract_template_parts(); apply_updates() drops it when it changes the tree
+        parts = self._template_parts.get(with_defn)
+        if parts is None:
+            parts = self._template_parts[with_defn] = extract_template_parts(self.tree, with_defn)
+        return parts
+
+    def defn_keys(self):
+        # <Package><Defn> attribute names used by the template
+        keys = set()
+        for entries in self.packages.values():
+            for entry in entries:
+                keys.update(entry[1].attrib)
+        return keys
+
+
+def save_rows(table, view_rows, incremental, strict=False):
+    """Rows to apply on save. An incremental save (the template is the file the table was
+    loaded from) only needs the edited rows, hidden ones included; strict saving also
+    rewrites unedited packages, so it takes every row."""
+    if not incremental:
+        return view_rows
+    if strict:
+        return range(len(table))
+    return sorted(table.dirty)
+
+
+def update_map(table, rows):
+    # norm PartName -> model row; the last row wins, as with a dict built in view order
+    names = table.names
+    return {norm_name(names[r]): r for r in rows}
+
+
+def apply_updates(index, table, rows, defn_keys, strict=False):
+    """Apply model rows to the template in one pass. Returns (changed count, skipped names).
+
+    Packages whose values already match their row are left untouched.
+    """
+    # classify columns once: <Package><Defn> attributes vs SymbolUserProps
+    defn_cols = [(p, table.column(p)) for p in table.props if p in defn_keys]
+    sup_cols = [(p, table.column(p)) for p in table.props if p not in defn_keys]
+    defn_lower = {p.lower() for p, _ in defn_cols}
+    updates = update_map(table, rows)
+
+    count = 0
+    skipped = [pname for key, pname in index.order if key not in updates]
+    for key, r in updates.items():
+        for pname, pkg_defn, libpart, lib_defn, pkg in index.packages.get(key, ()):
+            props_defn = {p: col[r] for p, col in defn_cols}
+            props_sup = {p: col[r] for p, col in sup_cols}
+            if not part_changed(pkg_defn, libpart, lib_defn, props_defn, props_sup, defn_lower, strict):
+                continue
+            apply_part(pkg_defn, libpart, lib_defn, props_defn, props_sup, defn_lower, strict)
+            index.touched.add(pkg)
+            count += 1
+    if count:
+        index._template_parts.clear()
+    return count, skipped
+
+
+def _desired_sups(mask, props_sup, defn_lower, strict):
+    out = []
+    for prop_name, orig_val in mask.items():
+        val = props_sup.get(prop_name, orig_val)
+        if strict and not val:
+            continue
+        out.append((str(prop_name), str(val)))
+    used_keys = {k.lower() for k in mask}
+    for k, v in props_sup.items():
+        if not v or k.lower() in used_keys or k.lower() in defn_lower:
+            continue
+        out.append((str(k), str(v)))
+    return out
+
+
+def part_changed(pkg_defn, libpart, lib_defn, props_defn, props_sup, defn_lower, strict=False):
+    # True when apply_part() would produce a different package
+    for k, v in props_defn.items():
+        if pkg_defn.get(k) != (str(v).strip() if v is not None else ""):
+            return True
+    if any(a != 'CellName' for a in lib_defn.attrib):
+        return True
+    if 'CellName' in props_defn and lib_defn.get('CellName') != props_defn['CellName']:
+        return True
+    mask = user_props(libpart)
+    desired = _desired_sups(mask, props_sup, defn_lower, strict)
+    nv = libpart.find('NormalView')
+    if nv is None:
+        return bool(desired)
+    current = []
+    for sup in nv.findall('SymbolUserProp'):
+        if len(sup) != 1 or sup.attrib or sup[0].tag != 'Defn' or len(sup[0].attrib) != 2:
+            return True
+        current.append((sup[0].get('name'), sup[0].get('val')))
+    # SymbolUserProps outside the first NormalView would be folded into it
+    return current != desired or len(current) != len(mask)
+
+
+def apply_part(pkg_defn, libpart, lib_defn, props_defn, props_sup, defn_lower, strict=False):
+    # Always update all <Package><Defn> attributes (mandatory fields)
+    for k, v in props_defn.items():
+        pkg_defn.set(k, str(v).strip() if v is not None else "")
+
+    # Keep only CellName in <LibPart><Defn>
+    for attrib in list(lib_defn.attrib):
+        if attrib != 'CellName':
+            del lib_defn.attrib[attrib]
+
+    if 'CellName' in props_defn:
+        lib_defn.set('CellName', props_defn['CellName'])
+
+    # template mask, read before the old SymbolUserProps are dropped
+    mask = user_props(libpart)
+
+    # Ensure <NormalView> exists
+    nv = libpart.find('NormalView')
+    if nv is None:
+        nv = ET.SubElement(libpart, 'NormalView')
+
+    # Remove old SymbolUserProps
+    for old in list(nv.findall('SymbolUserProp')):
+        nv.remove(old)
+
+    # Add SymbolUserProps from template mask (preserve order), then new ones not in template or Defn
+    for name, val in _desired_sups(mask, props_sup, defn_lower, strict):
+        sup = ET.SubElement(nv, 'SymbolUserProp')
+        ET.SubElement(sup, 'Defn', name=name, val=val)
+
+
+def _stat_key(path):
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def package_spans(path):
+    """Byte ranges [start of <Package>, start of </Package>) in document order, and the declared encoding."""
+    spans, stack, decl = [], [], ['utf-8']
+    parser = expat.ParserCreate()
+
+    def start(tag, attrs):
+        if tag == 'Package':
+            stack.append(len(spans))
+            spans.append([parser.CurrentByteIndex, None])
+
+    def end(tag):
+        if tag == 'Package':
+            spans[stack.pop()][1] = parser.CurrentByteIndex
+
+    def xml_decl(version, encoding, standalone):
+        if encoding:
+            decl[0] = encoding
+
+    parser.StartElementHandler = start
+    parser.EndElementHandler = end
+    parser.XmlDeclHandler = xml_decl
+    with open(path, 'rb') as f:
+        parser.ParseFile(f)
+    return spans, decl[0]
+
+
+def write_tree(index, path, progress=None):
+    """Write the template to `path`, patching only touched Packages into the source bytes
+    when possible. Returns 'patched' or 'full'.
+
+    The file is written to a temporary name next to `path` and renamed over it when
+    complete, so an interrupted save never leaves a partial library. `progress(f)` is
+    called with the fraction done. Afterwards `path` holds exactly the tree, so it
+    becomes the source for the next save.
+    """
+    if index.source and _patch_write(index, path):
+        mode = 'patched'  # _patch_write left the spans of the new file in index._spans
+    else:
+        _full_write(index, path, progress)
+        mode = 'full'
+        index._spans = None
+    if progress:
+        progress(1.0)
+    index.source = path
+    index.source_stat = _stat_key(path)
+    index.touched.clear()
+    return mode
+
+
+@contextmanager
+def _atomic_output(path, mode='wb', **kw):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, mode, **kw) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _full_write(index, path, progress=None):
+    total = len(index.all_packages) or 1
+    report = (lambda n: progress(n / total)) if progress else None
+    root = index.tree.getroot()
+    try:
+        with _atomic_output(path, 'w', encoding='utf-8', errors='xmlcharrefreplace', newline='\n') as f:
+            f.write("<?xml version='1.0' encoding='utf-8'?>\n")
+            out = Serializer(f.write, progress=report)
+            out.element(root)
+            if root.tail:
+                out.text(root.tail)
+            out.flush()
+    except _Unsupported:
+        # comments, processing instructions or namespaces: ElementTree writes those
+        ET.indent(index.tree, space=INDENT)
+        with _atomic_output(path) as f:
+            index.tree.write(f, encoding='utf-8', xml_declaration=True)
+
+
+def _patch_write(index, path):
+    if not os.path.exists(index.source) or _stat_key(index.source) != index.source_stat:
+        return False
+    if index._spans is None or index._spans[0] is None:
+        index._spans = package_spans(index.source)
+    spans, encoding = index._spans
+    if len(spans) != len(index.all_packages):
+        return False
+    pos_of = {id(pkg): i for i, pkg in enumerate(index.all_packages)}
+    touched = sorted(pos_of[id(pkg)] for pkg in index.touched)
+    prev_end = -1
+    for i in touched:
+        start, end = spans[i]
+        if start < prev_end or end is None:
+            return False  # nested or self-closing Package: let the full writer handle it
+        prev_end = end
+
+    try:
+        # the source is closed before the temp file replaces `path`, which may be the source itself
+        # (Windows refuses to replace an open file)
+        edits = {}  # package index -> (old length, new length, offset of </Package> in the new bytes)
+        with _atomic_output(path) as out:
+            with open(index.source, 'rb') as src:
+                pos = 0
+                for i in touched:
+                    start, end = spans[i]
+                    _copy_range(src, out, pos, start)
+                    prefix = _line_prefix(src, start)
+                    src.seek(end)
+                    end += src.read(256).index(b'>') + 1
+                    data = _serialize_package(index.all_packages[i], prefix, encoding)
+                    out.write(data)
+                    edits[i] = (end - start, len(data), data.rfind(b'</Package'))
+                    pos = end
+                src.seek(pos)
+                shutil.copyfileobj(src, out)
+    except _Unsupported:
+        return False
+    index._spans = _shifted_spans(spans, edits), encoding
+    return True
+
+
+def _shifted_spans(spans, edits):
+    """Package spans of the patched file, from the source's spans and the rewritten packages,
+    so the next patched save needs no rescan. None when they cannot be derived."""
+    for i, (_, new, close) in edits.items():
+        if close < 0 or i + 1 < len(spans) and spans[i + 1][0] < spans[i][1]:
+            return None  # non-ASCII-compatible encoding, or a Package nested in a rewritten one
+    order = sorted(edits)
+    stops = [spans[i][0] + edits[i][0] for i in order]
+    shifts = list(accumulate(edits[i][1] - edits[i][0] for i in order))
+
+    def moved(offset):
+        k = bisect_right(stops, offset)
+        return offset + shifts[k - 1] if k else offset
+
+    shifted = []
+    for i, (start, end) in enumerate(spans):
+        if i in edits:
+            start = moved(start)
+            shifted.append([start, start + edits[i][2]])
+        else:
+            shifted.append([moved(start), None if end is None else moved(end)])
+    return shifted
+
+
+def _copy_range(src, out, start, stop, chunk=1 << 20):
+    src.seek(start)
+    left = stop - start
+    while left > 0:
+        buf = src.read(min(chunk, left))
+        if not buf:
+            break
+        out.write(buf)
+        left -= len(buf)
+
+
+def _line_prefix(src, start):
+    # whitespace between the previous newline and the Package tag, reused as indentation
+    back = min(start, 256)
+    src.seek(start - back)
+    head = src.read(back)
+    prefix = head[head.rfind(b'\n') + 1:]
+    return prefix.decode('ascii') if not prefix.strip() else ''
+
+
+def _serialize_package(pkg, prefix, encoding):
+    parts = []
+    out = Serializer(parts.append, prefix)
+    out.element(pkg)
+    out.flush()
+    return ''.join(parts).encode(encoding, 'xmlcharrefreplace')
+
+
+INDENT = "  "
+FLUSH_PARTS = 8192
+
+
+class _Unsupported(Exception):
+    pass
+
+
+def _escape_text(text):
+    if '&' in text:
+        text = text.replace('&', '&amp;')
+    if '<' in text:
+        text = text.replace('<', '&lt;')
+    if '>' in text:
+        text = text.replace('>', '&gt;')
+    return text
+
+
+def _escape_attrib(text):
+    text = _escape_text(text)
+    if '"' in text:
+        text = text.replace('"', '&quot;')
+    if '\r' in text:
+        text = text.replace('\r', '&#13;')
+    if '\n' in text:
+        text = text.replace('\n', '&#10;')
+    if '\t' in text:
+        text = text.replace('\t', '&#09;')
+    return text
+
+
+class Serializer:
+    """Streams elements as XML identical to ET.indent() followed by ET.write(), without
+    modifying the tree. Indentation strings are built once per depth; every line is
+    prefixed with `prefix`. Elements other than plain tags raise _Unsupported."""
+
+    def __init__(self, write, prefix='', progress=None):
+        self._write = write
+        self.prefix = prefix
+        self.progress = progress   # called with the number of Packages written so far
+        self.packages = 0
+        self._indents = []
+        self._parts = []
+
+    def indent(self, level):
+        while len(self._indents) <= level:
+            self._indents.append('\n' + self.prefix + INDENT * len(self._indents))
+        return self._indents[level]
+
+    def text(self, text):
+        self._parts.append(_escape_text(text))
+
+    def flush(self):
+        if self._parts:
+            self._write(''.join(self._parts))
+            self._parts.clear()
+
+    def element(self, elem, level=0):
+        tag = elem.tag
+        if not isinstance(tag, str) or tag[:1] == '{':
+            raise _Unsupported(tag)
+        w = self._parts.append
+        w('<' + tag)
+        for k, v in elem.attrib.items():
+            if k[:1] == '{':
+                raise _Unsupported(k)
+            w(f' {k}="{_escape_attrib(v)}"')
+        text = elem.text
+        n = len(elem)
+        if n:
+            w('>')
+            w(self.indent(level + 1) if not text or not text.strip() else _escape_text(text))
+            for i, child in enumerate(elem):
+                self.element(child, level + 1)
+                tail = child.tail
+                if not tail or not tail.strip():
+                    w(self.indent(level + 1 if i < n - 1 else level))
+                else:
+                    w(_escape_text(tail))
+            w('</' + tag + '>')
+        elif text:
+            w('>' + _escape_text(text) + '</' + tag + '>')
+        else:
+            w(' />')
+        if tag == 'Package':
+            self.packages += 1
+            if self.progress and self.packages % 500 == 0:
+                self.progress(self.packages)
+        if len(self._parts) > FLUSH_PARTS:
+            self.flush()
@@ -0,0 +1,24 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import pytest
+
+from benchmarks import write_library
+
+
+@pytest.fixture
+def library(tmp_path):
+    """A generated 200-part library on disk."""
+    path = str(tmp_path / 'lib.xml')
+    write_library(path, 200, n_props=6, entropy=0.1)
+    return path
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    # parse cache and journal sidecars stay inside the test's directory
+    path = tmp_path / 'cache'
+    monkeypatch.setenv('ORCAD_LIBMGR_CACHE', str(path))
+    return path
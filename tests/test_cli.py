@@ -0,0 +1,83 @@
+import json
+import shutil
+
+import pytest
+
+import csv_io
+import orcad_libmgr as cli
+from benchmarks import write_library
+
+
+@pytest.fixture
+def exported(library, tmp_path):
+    path = str(tmp_path / 'lib.csv')
+    assert cli.main(['export', library, '-o', path]) == cli.EXIT_OK
+    return path
+
+
+def _edit(path, out, value):
+    table = csv_io.read_table(path)
+    table.set(0, table.props[-1], value)
+    csv_io.write_table(out, table)
+    return out
+
+
+def test_compare(library, exported, tmp_path):
+    assert cli.main(['compare', exported, '-t', library]) == cli.EXIT_OK
+    edited = _edit(exported, str(tmp_path / 'edited.csv'), 'changed')
+    diff = str(tmp_path / 'diff.json')
+    assert cli.main(['compare', edited, '-t', library, '-o', diff]) == cli.EXIT_FAILED
+    with open(diff, encoding='utf-8') as f:
+        assert json.load(f)['summary']['value changed'] == 1
+
+
+def test_validate(library, exported, tmp_path):
+    rules = tmp_path / 'rules.json'
+    rules.write_text(json.dumps([{'check': 'required', 'column': 'Prop0'}]), encoding='utf-8')
+    assert cli.main(['validate', exported, '-t', library, '--rules', str(rules)]) == cli.EXIT_OK
+    edited = _edit(exported, str(tmp_path / 'edited.csv'), '')
+    rules.write_text(json.dumps([{'check': 'required', 'column': csv_io.read_table(edited).props[-1]}]),
+                     encoding='utf-8')
+    assert cli.main(['validate', edited, '--rules', str(rules)]) == cli.EXIT_FAILED
+    new = tmp_path / 'new.csv'
+    new.write_text('PartName,Prop0\nNOT_IN_TEMPLATE,1k\n', encoding='utf-8')
+    assert cli.main(['validate', str(new), '-t', library]) == cli.EXIT_FAILED
+    assert cli.main(['validate', str(new), '-t', library, '--allow-new']) == cli.EXIT_OK
+
+
+def test_import_then_compare_matches(library, exported, tmp_path):
+    edited = _edit(exported, str(tmp_path / 'edited.csv'), 'changed')
+    out = str(tmp_path / 'out.xml')
+    assert cli.main(['import', edited, '-t', library, '-o', out, '--library', library]) == cli.EXIT_OK
+    assert cli.main(['compare', edited, '-t', out]) == cli.EXIT_OK
+
+
+def test_transform_dry_run(exported):
+    assert cli.main(['transform', exported, '--pack', 'BOM basics', '--dry-run']) == cli.EXIT_OK
+
+
+def test_batch(library, tmp_path):
+    other = str(tmp_path / 'other.xml')
+    shutil.copy(library, other)
+    assert cli.main(['batch', library, other, '-t', library, '-j', '1']) == cli.EXIT_OK
+    conflicting = str(tmp_path / 'conflicting.xml')
+    write_library(conflicting, 200, n_props=6, entropy=0.1, seed=1)  # same part names, other values
+    assert cli.main(['batch', library, conflicting, '--keys', 'Prop0', '-j', '1']) == cli.EXIT_FAILED
+
+
+@pytest.mark.parametrize('argv', [
+    ['export', 'missing.xml', '-o', 'out.csv'],
+    ['validate', 'edits.csv'],
+    ['transform', 'edits.csv'],
+])
+def test_input_errors_exit_2(argv, tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'edits.csv').write_text('PartName,A\nR1,x\n', encoding='utf-8')
+    assert cli.main(argv) == cli.EXIT_ERROR
+    assert 'orcad-libmgr: error:' in capsys.readouterr().err
+
+
+def test_usage_errors_exit_2():
+    with pytest.raises(SystemExit) as exc:
+        cli.main(['compare', 'edits.csv'])
+    assert exc.value.code == cli.EXIT_ERROR
@@ -0,0 +1,90 @@
+import codecs
+
+import pytest
+
+import csv_io
+import orcad_xml
+from part_table import PartTable
+
+HEADER = ['PartName', 'Value', 'Vendor']
+ROWS = [['R1', '4µ7', 'Müller'], ['C1', '100nF', 'Señor; Co'], ['U1', '', 'TI']]
+
+
+def _write(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+    return str(path)
+
+
+def _lines(delimiter, quote=False):
+    cell = (lambda v: f'"{v}"' if delimiter in v else v) if quote else str
+    return '\r\n'.join(delimiter.join(cell(v) for v in row) for row in [HEADER] + ROWS) + '\r\n'
+
+
+def _read(path):
+    with csv_io.CsvReader(path, chunk=2) as reader:
+        rows = [row for chunk in reader for row in chunk]
+        return reader.format, reader.header, rows
+
+
+def test_utf8_bom(tmp_path):
+    path = _write(tmp_path / 'a.csv', codecs.BOM_UTF8 + _lines(',').encode('utf-8'))
+    fmt, header, rows = _read(path)
+    assert (fmt.encoding, fmt.delimiter, fmt.bom) == ('utf-8', ',', True)
+    assert header == HEADER  # no BOM glued to PartName
+    assert rows == ROWS
+
+
+def test_cp1252_semicolons(tmp_path):
+    path = _write(tmp_path / 'a.csv', _lines(';', quote=True).encode('cp1252'))
+    fmt, header, rows = _read(path)
+    assert (fmt.encoding, fmt.delimiter, fmt.bom) == ('cp1252', ';', False)
+    assert (header, rows) == (HEADER, ROWS)
+
+
+@pytest.mark.parametrize('codec', ['utf-16-le', 'utf-16-be'])
+def test_utf16(tmp_path, codec):
+    bom = codecs.BOM_UTF16_LE if codec.endswith('le') else codecs.BOM_UTF16_BE
+    path = _write(tmp_path / 'a.csv', bom + _lines('\t').encode(codec))
+    fmt, header, rows = _read(path)
+    assert (fmt.encoding, fmt.delimiter, fmt.bom) == ('utf-16', '\t', True)
+    assert (header, rows) == (HEADER, ROWS)
+
+
+def test_utf8_with_stray_cp1252_bytes_past_the_sniffed_block(tmp_path):
+    filler = ''.join(f'P{i},{i},x\r\n' for i in range(csv_io.SNIFF_BYTES // 8))
+    data = (_lines(',', quote=True) + filler).encode('utf-8') + 'LAST,5µF,Zoë\r\n'.encode('cp1252')
+    fmt, header, rows = _read(_write(tmp_path / 'a.csv', data))
+    assert fmt.encoding == 'utf-8'
+    assert rows[:3] == ROWS
+    assert rows[-1] == ['LAST', '5µF', 'Zoë']
+
+
+def test_missing_partname(tmp_path):
+    with pytest.raises(ValueError):
+        csv_io.CsvReader(_write(tmp_path / 'a.csv', b'Name,Value\r\nR1,1k\r\n'))
+
+
+def test_export_keeps_the_import_format(library, tmp_path):
+    table, _ = orcad_xml.load_table(library)
+    for fmt in (csv_io.CsvFormat('utf-8', ';', bom=True), csv_io.CsvFormat('cp1252', '\t'),
+                csv_io.CsvFormat('utf-16', ',', bom=True)):
+        path = str(tmp_path / 'out.csv')
+        csv_io.write_table(path, table, fmt=fmt)
+        back = csv_io.read_table(path)
+        with csv_io.CsvReader(path) as reader:
+            assert reader.format.delimiter == fmt.delimiter
+        assert list(back.rows()) == list(table.rows())
+
+
+def test_columns_added_during_an_export_stay_out_of_it(tmp_path):
+    table = PartTable.from_rows(['PartName', 'A'], [['p0', 'x'], ['p1', 'x'], ['p2', 'x']])
+    path = str(tmp_path / 'out.csv')
+    progress = csv_io.iter_write(path, table, chunk=1)
+    next(progress)
+    table.set(2, 'B', 'late')  # e.g. a streaming load finding a new property
+    table.reorder(['B', 'A'])
+    for _ in progress:
+        pass
+    with open(path, encoding='utf-8-sig') as f:
+        assert f.read().splitlines() == ['PartName,A', 'p0,x', 'p1,x', 'p2,x']
@@ -0,0 +1,64 @@
+import orcad_xml
+from journal import Journal, pending
+
+
+def test_pending_changes_recover_into_a_fresh_table(library):
+    table, _ = orcad_xml.load_table(library)
+    journal = Journal(table, source=library)
+    prop = table.props[1]
+    original = table.get(4, prop)
+    table.set(4, prop, 'first')
+    with journal.group():
+        table.set(4, prop, 'second')
+        table.set(9, 'Added', 'new column')
+    assert journal.sync(force=True)
+    journal.close()  # the crash: the sidecar stays behind
+
+    changes = pending(library)
+    assert changes == [(4, prop, 'first'), (4, prop, 'second'), (9, 'Added', 'new column')]
+
+    fresh, _ = orcad_xml.load_table(library)
+    recovered = Journal(fresh, source=library)
+    assert recovered.recover(changes) == 3
+    assert fresh.get(4, prop) == 'second'
+    assert fresh.get(9, 'Added') == 'new column'
+    recovered.undo()  # the recovered changes form one step
+    assert (fresh.get(4, prop), fresh.get(9, 'Added')) == (original, '')
+
+
+def test_pending_ignores_a_changed_source(library):
+    table, _ = orcad_xml.load_table(library)
+    journal = Journal(table, source=library)
+    table.set(0, table.props[0], 'x')
+    journal.sync(force=True)
+    journal.close()
+    with open(library, 'ab') as f:
+        f.write(b'\n')
+    assert pending(library) == []
+
+
+def test_pending_stops_at_a_torn_line(library):
+    table, _ = orcad_xml.load_table(library)
+    journal = Journal(table, source=library)
+    table.set(0, table.props[0], 'kept')
+    journal.sync(force=True)
+    journal._file.write('["s", 1, 0, "", "to')
+    journal.close()
+    assert pending(library) == [(0, table.props[0], 'kept')]
+
+
+def test_rebase_keeps_edits_made_during_a_save(library, tmp_path):
+    table, _ = orcad_xml.load_table(library)
+    journal = Journal(table, source=library)
+    prop = table.props[0]
+    table.set(1, prop, 'saved')
+    saved, table.dirty = table.dirty, {}  # as save_xml hands the saved edits to the writer
+    table.set(2, prop, 'during the save')
+    saved_to = str(tmp_path / 'saved.xml')
+    with open(library, 'rb') as src, open(saved_to, 'wb') as out:
+        out.write(src.read())
+    journal.rebase(saved_to, keep=table.dirty)
+    journal.sync(force=True)
+    journal.close()
+    assert pending(library) == []
+    assert pending(saved_to) == [(2, prop, 'during the save')]
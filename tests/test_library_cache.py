@@ -0,0 +1,58 @@
+import os
+import pickle
+
+import library_cache
+import orcad_xml
+
+
+def _same(a, b):
+    (ta, ka), (tb, kb) = a, b
+    return ta.header() == tb.header() and list(ta.rows()) == list(tb.rows()) and ka == kb
+
+
+def test_cached_load_matches_the_parse(library):
+    parsed = orcad_xml.load_table(library)
+    assert _same(library_cache.load_table(library), parsed)
+    assert os.path.exists(library_cache.cache_path(library))
+    assert _same(library_cache.lookup(library), parsed)
+
+
+def test_a_changed_file_misses(library):
+    library_cache.load_table(library)
+    with open(library, 'ab') as f:
+        f.write(b'\n')
+    assert library_cache.lookup(library) is None
+
+
+def test_a_touched_file_hits_once_by_hash(library, monkeypatch):
+    library_cache.load_table(library)
+    st = os.stat(library)
+    os.utime(library, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    hashed = []
+    real = library_cache.file_hash
+    monkeypatch.setattr(library_cache, 'file_hash', lambda p: hashed.append(p) or real(p))
+    assert library_cache.lookup(library) is not None
+    assert library_cache.lookup(library) is not None
+    assert len(hashed) == 1  # the first hit recorded the new mtime
+
+
+class _Boom:
+    def __reduce__(self):
+        return (os.system, ('echo pickled code ran > boom',))
+
+
+def test_damaged_or_foreign_entries_are_not_loaded(library, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    library_cache.load_table(library)
+    entry = library_cache.cache_path(library)
+    with open(entry, 'rb') as f:
+        data = f.read()
+    for bad in (data[:-3], data[:data.index(b'\n') + 5], b'', b'\x00' * 64,
+                pickle.dumps({'version': 1}) + pickle.dumps(_Boom())):
+        with open(entry, 'wb') as f:
+            f.write(bad)
+        assert library_cache.lookup(library) is None
+    assert not os.path.exists('boom')
+    # the next load parses again and rewrites the entry
+    assert _same(library_cache.load_table(library), orcad_xml.load_table(library))
+    assert library_cache.lookup(library) is not None
@@ -0,0 +1,72 @@
+from array import array
+
+from part_table import Column, PartTable
+
+
+def test_column_acts_like_a_list_of_strings():
+    col = Column.from_values(['a', 'b', 'a', ''])
+    assert list(col) == ['a', 'b', 'a', ''] and len(col) == 4
+    assert (col[1], col[1:3]) == ('b', ['b', 'a'])
+    col[1] = 'a'
+    col.extend(['c', 'a'])
+    col.extend_blank(2)
+    assert list(col) == ['a', 'a', 'a', '', 'c', 'a', '', '']
+    assert col.value_counts() == {'': 3, 'a': 4, 'c': 1}  # 'b' is unused now
+    assert col.distinct() == {'', 'a', 'c'} and col.distinct(4) == {'c', 'a', ''}
+    assert list(col.rows_with('a')) == [0, 1, 2, 5] and len(col.rows_with('b')) == 0
+    assert {v: list(rows) for v, rows in col.groups().items()} == {'': [3, 6, 7], 'a': [0, 1, 2, 5], 'c': [4]}
+    assert {v: list(rows) for v, rows in col.groups(5).items()} == {'a': [5], '': [6, 7]}
+
+
+def test_column_map_calls_once_per_distinct_value():
+    col = Column.from_values(['x', 'y', 'x', 'x'])
+    seen = []
+    assert col.map(lambda v: seen.append(v) or v.upper()) == ['X', 'Y', 'X', 'X']
+    assert sorted(seen) == ['x', 'y']
+    assert col.map(str.upper, 2) == ['X', 'X']
+
+
+def test_encoded_counts_codes():
+    col = Column.encoded(['', 'a', 'b'], array('I', [1, 1, 0, 2]))
+    assert col.value_counts() == {'': 1, 'a': 2, 'b': 1}
+    assert col.ids == {'': 0, 'a': 1, 'b': 2}
+
+
+def test_extend_rows_with_new_and_duplicate_headers():
+    table = PartTable.from_rows(['PartName', 'A', 'B'], [['p1', '1', '2'], ['p2', '3'], []])
+    start = table.extend_rows(['PartName', 'B', 'C', 'B'], [['p3', 'b', 'c', 'b2']])
+    assert start == 3
+    assert table.header() == ['PartName', 'A', 'B', 'C']
+    assert list(table.rows()) == [('p1', '1', '2', ''), ('p2', '3', '', ''), ('', '', '', ''),
+                                  ('p3', '', 'b2', 'c')]
+    assert list(table.rows([3, 0], table.columns[:1])) == [('p3', ''), ('p1', '1')]
+    assert table.row(1) == ['p2', '3', '', ''] and table.row_dict(0) == {'A': '1', 'B': '2', 'C': ''}
+
+
+def test_set_tracks_dirty_observers_and_the_name_index():
+    table = PartTable.from_rows(['PartName', 'A'], [['p1', 'x'], ['p2', 'y'], ['p1', 'z']])
+    events = []
+    table.observers.append(lambda *e: events.append(e))
+    version = table.version
+    table.set(0, 'A', 'x')  # unchanged: nothing recorded
+    assert (table.dirty, events, table.version) == ({}, [], version)
+    table.set(1, 'New', 'n')
+    table.set(0, 'PartName', 'p0')
+    assert table.dirty == {1: {'New'}, 0: {'PartName'}}
+    assert events == [(1, 'New', '', 'n'), (0, 'PartName', 'p1', 'p0')]
+    assert table.version > version
+    assert (table.find('p1'), table.find('p0'), table.find('p2')) == (2, 0, 1)
+    assert table.get(2, 'New') == '' and table.get(0, 'Missing') == ''
+
+
+def test_table_queries_include_partname():
+    table = PartTable.from_rows(['PartName', 'A'], [['p1', 'x'], ['p2', 'x'], ['p1', '']])
+    assert table.value_counts('PartName') == {'p1': 2, 'p2': 1}
+    assert table.value_counts('A') == {'x': 2, '': 1}
+    assert table.distinct('PartName', 1) == {'p1', 'p2'}
+    assert list(table.rows_with('PartName', 'p1')) == [0, 2] and list(table.rows_with('Nope', 'x')) == []
+    assert table.map_column('A', str.upper) == ['X', 'X', '']
+    assert {v: list(r) for v, r in table.groups('PartName', 1).items()} == {'p2': [1], 'p1': [2]}
+    table.reorder(['A'])
+    table.append('p3', {'B': 'b', 'A': None})
+    assert table.header() == ['PartName', 'A', 'B'] and table.row(3) == ['p3', '', 'b']
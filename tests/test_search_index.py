@@ -0,0 +1,42 @@
+import orcad_xml
+from part_table import PartTable
+from search_index import SearchIndex, parse_query
+
+
+def _brute(table, text):
+    terms = parse_query(text, table.header())
+    return {r for r in range(len(table))
+            if all(t in (table.get(r, c).lower() if c else ' '.join(table.row(r)).lower()) for c, t in terms)}
+
+
+def test_parse_query():
+    cols = ['PartName', 'Manufacturer']
+    assert parse_query('manufacturer:TI 10K', cols) == [('Manufacturer', 'ti'), (None, '10k')]
+    assert parse_query('Nope:x "two words"', cols) == [(None, 'nope:x'), (None, 'two words')]
+    assert parse_query('Manufacturer: "unbalanced', cols) == [(None, 'manufacturer:'), (None, '"unbalanced')]
+
+
+def test_matches_a_full_scan(library):
+    table, _ = orcad_xml.load_table(library)
+    index = SearchIndex(table)
+    assert index.search('') is None
+    # each query narrows the one before, so the later ones take the refine path
+    for text in ('1', '10', '10.', 'Prop1:tdk', 'Prop1:tdk 1', 'Prop1:tdk 12', 'part_0001', 'MPN-0000', 'zz'):
+        assert index.search(text) == _brute(table, text), text
+
+
+def test_follows_edits_and_appended_rows():
+    table = PartTable.from_rows(['PartName', 'Mfr'], [['r1', 'Murata'], ['r2', 'TDK'], ['r3', 'murata']])
+    index = SearchIndex(table)
+    assert index.search('mura') == {0, 2}
+    assert index.search('Mfr:murata') == {0, 2}  # narrowed from the last query
+    table.set(2, 'Mfr', 'Yageo')
+    assert index.search('mura') == {0}
+    table.set(1, 'Mfr', 'Murata')
+    assert index.search('mura') == {0, 1}
+    table.extend_rows(['PartName', 'Mfr', 'Value'], [['r4', 'MURATA', '10k']])
+    assert index.search('mura') == {0, 1, 3}
+    assert index.search('value:10') == {3}
+    index.close()
+    table.set(0, 'Mfr', 'TI')
+    assert table.observers == []
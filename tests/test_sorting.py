@@ -0,0 +1,49 @@
+from part_table import PartTable
+from sorting import SortKeyCache, sort_key
+
+
+def _sorted(values):
+    return sorted(values, key=sort_key)
+
+
+def test_si_values_sort_by_magnitude():
+    assert _sorted(['1uF', '100nF', '10pF', '2.2uF', '0.5mF', '4,7nF']) == \
+        ['10pF', '4,7nF', '100nF', '1uF', '2.2uF', '0.5mF']
+    assert _sorted(['10k', '1M', '4k7', '470', '4R7', '1K']) == ['4R7', '470', '1K', '4k7', '10k', '1M']
+
+
+def test_numbers_before_text_and_blanks_last():
+    assert _sorted(['', 'abc', '10', '  ', 'B', '0402']) == ['10', '0402', 'abc', 'B', '', '  ']
+
+
+def test_text_sorts_naturally_and_ignores_case():
+    assert _sorted(['R10', 'r2', 'R1', 'C10A', 'c9b']) == ['c9b', 'C10A', 'R1', 'r2', 'R10']
+
+
+def _cache():
+    table = PartTable.from_rows(['PartName', 'Value', 'Pkg'],
+                                [['a', '10k', '0603'], ['b', '', '0402'], ['c', '1k', '0402'],
+                                 ['d', 'TBD', ''], ['e', '1k', '0805']])
+    return table, SortKeyCache(table)
+
+
+def test_order_keeps_blanks_last_both_ways():
+    table, cache = _cache()
+    assert cache.order([('Value', False)]) == [2, 4, 0, 3, 1]
+    assert cache.order([('Value', True)]) == [3, 0, 2, 4, 1]
+    assert cache.order([('Pkg', True)]) == [4, 0, 1, 2, 3]
+
+
+def test_order_by_several_columns_is_stable():
+    table, cache = _cache()
+    assert cache.order([('Value', False), ('Pkg', True)]) == [4, 2, 0, 3, 1]
+    assert cache.order([('Missing', False)]) == [0, 1, 2, 3, 4]
+
+
+def test_edits_update_cached_keys_and_orders():
+    table, cache = _cache()
+    assert cache.order([('Value', False)])[0] == 2
+    table.set(0, 'Value', '1')
+    assert cache.order([('Value', False)])[0] == 0
+    table.append('f', {'Value': '1p'})
+    assert cache.order([('Value', False)])[0] == 5
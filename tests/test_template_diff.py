@@ -0,0 +1,56 @@
+import xml.etree.ElementTree as ET
+
+import orcad_xml
+import xml_save
+from part_table import PartTable
+from template_diff import (PART_ADDED, PART_REMOVED, PROP_ADDED, PROP_REMOVED, VALUE_CHANGED,
+                           TemplateDiff, table_maps)
+
+TEMPLATE = {'R1': {'Value': '10k', 'Tol': '1%'}, 'C1': {'Value': '100nF', 'Voltage': ''}, 'U9': {'Value': 'x'}}
+
+
+def test_changes_and_counts():
+    table = PartTable.from_rows(['PartName', 'value', 'Tol', 'Voltage'], [
+        [' r1 ', '10k ', '5%', ''],
+        ['C1', '100nF', '', '50V'],
+        ['Q1', '', '', ''],
+    ])
+    diff = TemplateDiff(table, TEMPLATE)
+    assert diff.changes == [
+        (VALUE_CHANGED, 'r1', 'Tol', '1%', '5%'),
+        (PROP_ADDED, 'C1', 'Voltage', '', '50V'),
+        (PART_ADDED, 'Q1', '', '', ''),
+        (PART_REMOVED, 'U9', '', '', ''),
+    ]
+    assert diff.rows == [0, 1, 2, None]
+    counts = diff.counts()
+    assert (counts['parts changed'], counts['parts unchanged'], counts[PROP_REMOVED]) == (2, 0, 0)
+
+
+def test_unchanged_parts_are_counted():
+    table = PartTable.from_rows(['PartName', 'Value', 'Tol'], [['R1', '10k', '1%'], ['C1', '100nF', '']])
+    counts = TemplateDiff(table, TEMPLATE).counts()
+    assert (counts['parts changed'], counts['parts unchanged'], counts[PART_REMOVED]) == (0, 2, 1)
+
+
+def test_duplicate_names_compare_the_row_save_writes(library):
+    table, defn_keys = orcad_xml.load_table(library)
+    prop = table.props[0]
+    name = table.name(3)
+    table.append(name, {**table.row_dict(3), prop: 'second copy'})
+    assert table_maps(table)[name.lower()][1] == len(table) - 1
+    tree = ET.parse(library)
+    diff = TemplateDiff(table, orcad_xml.extract_template_parts(tree, with_defn=True))
+    assert [c[1:] for c in diff.changes] == [(name, prop, table.get(3, prop), 'second copy')]
+
+    index = xml_save.TemplateIndex(tree)
+    xml_save.apply_updates(index, table, range(len(table)), defn_keys)
+    assert len(TemplateDiff(table, index.template_parts(with_defn=True))) == 0
+
+
+def test_write_by_extension(tmp_path):
+    table = PartTable.from_rows(['PartName', 'Value'], [['R1', '1k']])
+    diff = TemplateDiff(table, {'R1': {'Value': '10k'}})
+    assert diff.write(str(tmp_path / 'd.json')) == diff.write(str(tmp_path / 'd.csv')) == 1
+    assert (tmp_path / 'd.json').read_text(encoding='utf-8').startswith('{')
+    assert (tmp_path / 'd.csv').read_text(encoding='utf-8').splitlines()[1] == 'value changed,R1,Value,10k,1k'
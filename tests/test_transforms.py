@@ -0,0 +1,64 @@
+import pytest
+
+import transforms
+from journal import Journal
+from part_table import PartTable
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('4,7uF', '4.7uF'), ('100 nF', '100nF'), ('4K7', '4.7k'), ('10.0 k', '10k'), ('2.2µH', '2.2uH'),
+    ('1.50 Hz', '1.5Hz'), ('10 ohm', '10ohm'), ('4R7', '4R7'),
+    ('0402', '0402'), ('10', '10'), ('4,700uF', '4,700uF'), ('TDK', 'TDK'), ('', ''),
+])
+def test_units(value, expected):
+    assert transforms.Units()(value) == expected
+
+
+def test_replace_literal_and_regex():
+    assert transforms.Replace('.', '-')('1.2.3') == '1-2-3'
+    assert transforms.Replace(r'\1', 'x')('a\\1b') == 'axb'
+    assert transforms.Replace('(\\d+)k', r'\1K', regex=True)('10k 4k') == '10K 4K'
+    assert transforms.Replace('ti', 'TI', ignore_case=True)('Ti ti') == 'TI TI'
+
+
+@pytest.mark.parametrize('spec', [
+    {'rule': 'replace', 'pattern': '', 'replace': 'x'},
+    {'rule': 'replace', 'pattern': '', 'replace': 'x', 'regex': True},
+    {'rule': 'replace', 'pattern': '(', 'replace': '', 'regex': True},
+    {'rule': 'case', 'mode': 'sideways'},
+    {'rule': 'rename', 'from': 'A', 'to': 'A'},
+    {'rule': 'rename', 'from': 'PartName', 'to': 'A'},
+    {'rule': 'replace', 'find': 'a'},
+    {'rule': 'nope'},
+])
+def test_bad_specs_raise_valueerror(spec):
+    with pytest.raises(ValueError):
+        transforms.rule_from_spec(spec)
+
+
+def _table():
+    return PartTable.from_rows(['PartName', 'Value', 'Mfr', 'Manufacturer'],
+                               [['r1', '4K7', 'TI', ''], ['r2', '100 nF', 'tdk', 'TDK'], ['r3', '', '', '']])
+
+
+def test_preview_leaves_the_table_alone_and_apply_is_one_undo_step():
+    table = _table()
+    rules = [transforms.Units(['Value']), transforms.Rename('Mfr', 'Manufacturer'),
+             transforms.Case('upper', ['Manufacturer'])]
+    result = transforms.preview(table, rules)
+    assert sorted(result.changes) == [(0, 'Manufacturer', '', 'TI'), (0, 'Mfr', 'TI', ''),
+                                      (0, 'Value', '4K7', '4.7k'), (1, 'Mfr', 'tdk', ''),
+                                      (1, 'Value', '100 nF', '100nF')]
+    assert [n for _, n in result.counts] == [2, 2, 0]
+    assert table.get(0, 'Value') == '4K7'
+
+    journal = Journal(table)
+    assert transforms.apply(table, result, journal) == 5
+    assert [table.get(0, p) for p in ('Value', 'Mfr', 'Manufacturer')] == ['4.7k', '', 'TI']
+    journal.undo()
+    assert list(table.rows()) == list(_table().rows())
+
+
+def test_preview_limited_to_rows():
+    result = transforms.preview(_table(), [transforms.Case('lower')], rows=[1])
+    assert sorted(result.changes) == [(1, 'Manufacturer', 'TDK', 'tdk'), (1, 'Value', '100 nF', '100 nf')]
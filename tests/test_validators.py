@@ -0,0 +1,62 @@
+import pytest
+
+import orcad_xml
+import validators
+from part_table import PartTable
+
+RULES = [
+    {'check': 'required', 'columns': ['PartName', 'Value']},
+    {'check': 'enum', 'column': 'Tol', 'values': ['1%', '5%'], 'ignore_case': True},
+    {'check': 'pattern', 'column': 'Value', 'regex': r'\d+(\.\d+)?[pnumkM]?[FHΩ]?'},
+    {'check': 'cross', 'if': {'column': 'Type', 'regex': 'CAP.*'}, 'then': {'column': 'Voltage', 'regex': r'\d+V'}},
+    {'check': 'unique', 'column': 'PartName', 'name': 'dup'},
+]
+
+
+def _table():
+    return PartTable.from_rows(['PartName', 'Value', 'Tol', 'Type', 'Voltage'], [
+        ['C1', '100nF', '5%', 'CAP_CER', '50V'],
+        ['C2', '1 uF', '10%', 'CAP_EL', ''],
+        ['c1', '', '', 'RES', ''],
+        ['', '4.7k', '1%', '', 'x'],
+    ])
+
+
+def test_each_check():
+    report = validators.validate(_table(), RULES)
+    # by row, then in rule order
+    assert [(r, col, rule) for r, col, rule, _ in report.errors] == [
+        (0, 'PartName', 'dup'),
+        (1, 'Tol', 'Tol in list'), (1, 'Value', 'Value format'), (1, 'Voltage', 'Voltage when Type'),
+        (2, 'Value', 'PartName, Value required'), (2, 'PartName', 'dup'),
+        (3, 'PartName', 'PartName, Value required'),
+    ]
+    assert report.counts() == {'PartName, Value required': 2, 'Value format': 1, 'Tol in list': 1,
+                               'Voltage when Type': 1, 'dup': 2}
+    assert report.summary().startswith('7 problems in 4 of 4 rows')
+
+
+def test_rows_limit_the_check_and_missing_columns_are_blank():
+    report = validators.validate(_table(), [{'check': 'required', 'column': 'Nope'}], rows=[1, 3])
+    assert [e[0] for e in report.errors] == [1, 3]
+    assert report.rows_checked == 2
+
+
+@pytest.mark.parametrize('spec', [{'check': 'nope'}, {'check': 'enum', 'column': 'Tol'},
+                                  {'check': 'pattern', 'column': 'Value', 'regex': '('}])
+def test_bad_rules_raise_valueerror(spec):
+    with pytest.raises(ValueError):
+        validators.compile_rules([spec])
+
+
+def test_worker_processes_give_the_serial_result(library, monkeypatch):
+    table, _ = orcad_xml.load_table(library)
+    rules = [{'check': 'pattern', 'column': 'Prop0', 'regex': r'\d+(\.\d+)?[pnumkM]?[FHVΩ]?'},
+             {'check': 'enum', 'column': 'Prop1', 'values': ['TDK 0', 'Murata 0']},
+             {'check': 'unique', 'column': 'Prop2'}] + validators.DEFAULT_RULES
+    serial = validators.validate(table, rules, workers=1).errors
+    assert serial
+    monkeypatch.setattr(validators, 'PARALLEL_ROWS', 10)
+    monkeypatch.setattr(validators, 'CHUNK_ROWS', 64)
+    monkeypatch.setattr(validators.os, 'cpu_count', lambda: 2)
+    assert validators.validate(table, rules, workers=2).errors == serial
@@ -0,0 +1,74 @@
+import xml.etree.ElementTree as ET
+
+import orcad_xml
+import xml_save
+
+
+def _read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _edit(index, path, rows, value):
+    table, defn_keys = orcad_xml.load_table(path)
+    for r in rows:
+        table.set(r, table.props[0], value)
+    return xml_save.apply_updates(index, table, rows, defn_keys)[0]
+
+
+def test_serializer_matches_elementtree(library, tmp_path):
+    ours, theirs = str(tmp_path / 'ours.xml'), str(tmp_path / 'theirs.xml')
+    assert xml_save.write_tree(xml_save.TemplateIndex(ET.parse(library)), ours) == 'full'
+    tree = ET.parse(library)
+    ET.indent(tree, space=xml_save.INDENT)
+    tree.write(theirs, encoding='utf-8', xml_declaration=True)
+    assert _read(ours) == _read(theirs)
+
+
+def test_serializer_escapes_like_elementtree():
+    root = ET.fromstring('<Lib><Package><Defn name="a&amp;b &quot;c&quot;&#10;" val="&lt;x&gt;"/>'
+                         '<Note>1 &lt; 2 &amp; 3</Note></Package></Lib>')
+    parts = []
+    out = xml_save.Serializer(parts.append)
+    out.element(root)
+    out.flush()
+    tree = ET.ElementTree(root)
+    ET.indent(tree, space=xml_save.INDENT)
+    assert ''.join(parts) == ET.tostring(root, encoding='unicode')
+
+
+def test_patched_saves_match_full_writes(library, tmp_path):
+    out, full = str(tmp_path / 'out.xml'), str(tmp_path / 'full.xml')
+    index = xml_save.TemplateIndex(ET.parse(library))
+    assert xml_save.write_tree(index, out) == 'full'  # and `out` becomes the source
+    for save, rows in enumerate(([3, 50, 51, 199], [0, 120], [7, 8, 9, 180])):
+        assert _edit(index, out, rows, f'edited {save} <&>') == len(rows)
+        assert xml_save.write_tree(index, out) == 'patched'
+        # the spans kept for the next save are those of the written file
+        assert index._spans == xml_save.package_spans(out)
+        xml_save._full_write(index, full)
+        assert _read(out) == _read(full)
+
+
+def test_patched_save_with_nothing_touched_copies_the_source(library, tmp_path):
+    out = str(tmp_path / 'out.xml')
+    index = xml_save.TemplateIndex(ET.parse(library), source=library)
+    assert xml_save.write_tree(index, out) == 'patched'
+    assert _read(out) == _read(library)
+
+
+def test_strict_incremental_save_rewrites_unedited_packages(tmp_path):
+    path = str(tmp_path / 'lib.xml')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('<Lib><Packages>' + ''.join(
+            f'<Package><Defn name="PKG_{i}"/><LibPart><Defn CellName="PART_{i}"/><NormalView>'
+            f'<SymbolUserProp><Defn name="Value" val=""/></SymbolUserProp></NormalView></LibPart></Package>'
+            for i in range(2)) + '</Packages></Lib>')
+    for strict, changed in ((False, 0), (True, 2)):
+        table, defn_keys = orcad_xml.load_table(path)
+        index = xml_save.TemplateIndex(ET.parse(path), source=path)
+        rows = xml_save.save_rows(table, [], incremental=True, strict=strict)
+        assert xml_save.apply_updates(index, table, rows, defn_keys, strict=strict)[0] == changed
+    full = xml_save.TemplateIndex(ET.parse(path))
+    assert xml_save.apply_updates(full, table, xml_save.save_rows(table, range(2), False, True),
+                                  defn_keys, strict=True)[0] == 2